@@ -0,0 +1,61 @@
+"""Compare reply latency of the remote (LangGraph server) and in-process agents.
+
+Both modes run the same graph, so the difference is the transport overhead:
+the HTTP hop, SSE framing and JSON round trip of the state in remote mode.
+
+Usage:
+    LANGGRAPH_URL=http://localhost:2024 python -m evals.bench_agent_modes -n 20
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from langgraph_whatsapp.agent import Agent, InProcessAgent
+
+
+async def _bench(agent, sender: str, message: str, runs: int) -> dict:
+    # The first call pays for graph compilation / connection setup
+    start = time.perf_counter()
+    await agent.invoke(id=sender, user_message=message)
+    warmup = time.perf_counter() - start
+
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await agent.invoke(id=sender, user_message=message)
+        samples.append(time.perf_counter() - start)
+
+    samples.sort()
+    return {
+        "warmup": warmup,
+        "mean": statistics.mean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--runs", type=int, default=10)
+    parser.add_argument("-m", "--message", default="Hi! What are your business hours?")
+    parser.add_argument("--modes", nargs="+", default=["remote", "local"], choices=["remote", "local"])
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        agent = Agent() if mode == "remote" else InProcessAgent()
+        result = await _bench(agent, f"bench:{mode}", args.message, args.runs)
+        if mode == "local":
+            await agent.aclose()
+        print(
+            f"{mode:>6}: warmup {result['warmup']:.3f}s  mean {result['mean']:.3f}s  "
+            f"p50 {result['p50']:.3f}s  p95 {result['p95']:.3f}s  (n={args.runs})"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from langchain_core.tools import BaseTool
+
+LOGGER = logging.getLogger(__name__)
+
+# Business hours from CALENDAR_AGENT_PROMPT: Monday to Friday, 15:00 - 21:00
+OPENING_TIME = time(15, 0)
+CLOSING_TIME = time(21, 0)
+SLOT_MINUTES = 30
+
+Interval = Tuple[datetime, datetime]
+
+
+def business_days(start: date, count: int) -> List[date]:
+    """Return the next ``count`` weekdays, starting at ``start`` (inclusive)."""
+    days = []
+    day = start
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def shop_timezone() -> ZoneInfo:
+    """Return the shop's timezone, from the IANA name in ``SHOP_TIMEZONE``."""
+    return ZoneInfo(os.getenv("SHOP_TIMEZONE") or "UTC")
+
+
+def shop_now() -> datetime:
+    """Return the current naive wall-clock time at the shop."""
+    return datetime.now(shop_timezone()).replace(tzinfo=None)
+
+
+def _to_local(value: str) -> datetime:
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    # Calendar math elsewhere uses the shop's naive wall-clock time, so compare
+    # in that frame regardless of the server's timezone
+    return dt.astimezone(shop_timezone()).replace(tzinfo=None) if dt.tzinfo else dt
+
+
+def parse_busy_intervals(result: Any) -> List[Interval]:
+    """Extract ``(start, end)`` intervals from a ``Google_ListEvents`` result."""
+    if isinstance(result, str):
+        result = json.loads(result)
+    events = result.get("events", []) if isinstance(result, dict) else result
+
+    busy = []
+    for event in events or []:
+        start, end = event.get("start") or {}, event.get("end") or {}
+        if start.get("dateTime") and end.get("dateTime"):
+            busy.append((_to_local(start["dateTime"]), _to_local(end["dateTime"])))
+        elif start.get("date"):
+            # All-day events block the whole day
+            day = date.fromisoformat(start["date"])
+            last = date.fromisoformat(end["date"]) if end.get("date") else day + timedelta(days=1)
+            busy.append((datetime.combine(day, time.min), datetime.combine(last, time.min)))
+    return busy
+
+
+def compute_free_slots(days: List[date], busy: List[Interval], now: datetime) -> Dict[date, List[time]]:
+    """Return the free slot start times per day, skipping slots already in the past."""
+    slot = timedelta(minutes=SLOT_MINUTES)
+    busy = sorted(busy)
+    free = {}
+    for day in days:
+        start = datetime.combine(day, OPENING_TIME)
+        closing = datetime.combine(day, CLOSING_TIME)
+        slots = []
+        while start + slot <= closing:
+            end = start + slot
+            if start >= now and not any(b_start < end and start < b_end for b_start, b_end in busy):
+                slots.append(start.time())
+            start = end
+        free[day] = slots
+    return free
+
+
+def _format_ranges(slots: List[time]) -> str:
+    """Collapse consecutive slot start times, e.g. "15:00-16:30, 19:00"."""
+    if not slots:
+        return "fully booked"
+    step = timedelta(minutes=SLOT_MINUTES)
+    ranges, first, last = [], slots[0], slots[0]
+    for slot in slots[1:]:
+        if datetime.combine(date.min, slot) - datetime.combine(date.min, last) == step:
+            last = slot
+            continue
+        ranges.append((first, last))
+        first = last = slot
+    ranges.append((first, last))
+    return ", ".join(
+        f"{a:%H:%M}" if a == b else f"{a:%H:%M}-{b:%H:%M}" for a, b in ranges
+    )
+
+
+class AvailabilitySnapshot:
+    """Precomputed free 30-minute slots for the next business days.
+
+    A background task refreshes the snapshot from ``Google_ListEvents`` every
+    ``refresh_interval`` seconds, and right away when ``invalidate`` is called
+    after a booking. ``render`` returns a compact text block for the calendar
+    agent's prompt, or an empty string when the snapshot is missing or stale.
+    """
+
+    def __init__(self, days: int = 5, refresh_interval: float = 300.0):
+        self.days = days
+        self.refresh_interval = refresh_interval
+        self.free: Dict[date, List[time]] = {}
+        self.busy: List[Interval] = []
+        self.refreshed_at: Optional[datetime] = None
+        self._list_events: Optional[BaseTool] = None
+        self._config: Dict[str, Any] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, list_events_tool: BaseTool, user_id: str) -> None:
+        """Start the refresh task once per process; later calls are no-ops."""
+        if self._task is not None and not self._task.done():
+            return
+        self._list_events = list_events_tool
+        self._config = {"configurable": {"user_id": user_id}}
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.create_task(self._run())
+
+    def invalidate(self) -> None:
+        """Ask for a refresh now, e.g. after an event was created.
+
+        Safe to call from any thread; tool hooks run in worker threads.
+        """
+        if self._wakeup is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def record_booking(self, result: Any) -> None:
+        """Mark a ``Google_CreateEvent`` result as busy until the next refresh."""
+        if isinstance(result, str):
+            try:
+                result = json.loads(result)
+            except json.JSONDecodeError:
+                result = None
+        if isinstance(result, dict):
+            self.busy.extend(parse_busy_intervals({"events": [result.get("event", result)]}))
+        self.invalidate()
+
+    async def refresh(self, now: Optional[datetime] = None) -> None:
+        now = now or shop_now()
+        days = business_days(now.date(), self.days)
+        result = await self._list_events.ainvoke(
+            {
+                "min_end_datetime": datetime.combine(days[0], OPENING_TIME).isoformat(),
+                "max_start_datetime": datetime.combine(days[-1], CLOSING_TIME).isoformat(),
+                "max_results": 250,
+            },
+            self._config,
+        )
+        self.busy = parse_busy_intervals(result)
+        self.free = compute_free_slots(days, self.busy, now)
+        self.refreshed_at = now
+        LOGGER.info("Availability snapshot refreshed", extra={"days": len(days), "busy": len(self.busy)})
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                LOGGER.warning("Availability refresh failed: %s", e)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def render(self, now: Optional[datetime] = None) -> str:
+        now = now or shop_now()
+        if self.refreshed_at is None or now - self.refreshed_at > timedelta(seconds=2 * self.refresh_interval):
+            return ""
+        # Recompute from the cached events so slots that have passed drop out
+        free = compute_free_slots(sorted(self.free), self.busy, now)
+        lines = [f"- {day:%a %Y-%m-%d}: {_format_ranges(slots)}" for day, slots in sorted(free.items())]
+        return "\n".join(lines)
+
+
+_SNAPSHOT: Optional[AvailabilitySnapshot] = None
+
+
+def get_availability() -> AvailabilitySnapshot:
+    """Return the process-wide availability snapshot."""
+    global _SNAPSHOT
+    if _SNAPSHOT is None:
+        _SNAPSHOT = AvailabilitySnapshot(
+            days=int(os.getenv("AVAILABILITY_DAYS") or 5),
+            refresh_interval=float(os.getenv("AVAILABILITY_REFRESH_SECONDS") or 300),
+        )
+    return _SNAPSHOT
@@ -1,13 +1,17 @@
-from langgraph.prebuilt import create_react_agent
-from langgraph_supervisor import create_supervisor
+from typing import Annotated
+from langchain_core.tools import InjectedToolCallId, tool
+from langgraph.graph.state import StateNodeSpec
+from langgraph.prebuilt import InjectedState, ToolNode, create_react_agent
+from langgraph.prebuilt.chat_agent_executor import AgentStateWithStructuredResponse
+from langgraph_supervisor import create_handoff_tool, create_supervisor
 from contextlib import asynccontextmanager
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from agents.base.prompt import SUPERVISOR_PROMPT, RESEARCHER_AGENT_PROMPT, CALENDAR_AGENT_PROMPT
-from datetime import datetime
 import os
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from langchain_google_genai import ChatGoogleGenerativeAI
+from agents.base.models import get_chat_model
+from agents.base.availability import get_availability, shop_now
+from langchain_core.messages import SystemMessage
 from langchain_arcade import ArcadeToolManager
 
 
@@ -16,8 +20,6 @@ load_dotenv()
 @asynccontextmanager
 async def build_agent():
 
-    today = datetime.now().strftime("%Y-%m-%d")
- 
     # Define available MCP server URLs
     # You would add your sse url here, to use mcp servers
     # Example:
@@ -49,36 +51,167 @@ async def build_agent():
     )
     google_calendar_tools = arcade_manager.to_langchain(use_interrupts=False)
 
-    from agents.base.tools import calendar_math
+    from agents.base.tools import (
+        calendar_math,
+        fetch_memories,
+        add_memory,
+        run_as,
+        with_appointment_reminders,
+        with_availability_refresh,
+        with_conflict_check,
+    )
+    # The calendar is the shop's: list and create events as ARCADE_USER_ID, so
+    # the snapshot and the bookings always see the same calendar. The booking
+    # hooks still get the client's own config.
+    shop_user_id = os.getenv("ARCADE_USER_ID")
+    if shop_user_id:
+        google_calendar_tools = [run_as(t, shop_user_id) for t in google_calendar_tools]
+
+    # Queue a WhatsApp reminder for every appointment the agent books, keep
+    # the availability snapshot in sync with it, and report a booking that
+    # overlaps an event the snapshot did not know about yet
+    list_events = next((t for t in google_calendar_tools if t.name == "Google_ListEvents"), None)
+
+    def hook_create_event(t):
+        t = with_availability_refresh(with_appointment_reminders(t))
+        return with_conflict_check(t, list_events) if list_events else t
+
+    google_calendar_tools = [
+        hook_create_event(t) if t.name == "Google_CreateEvent" else t
+        for t in google_calendar_tools
+    ]
+
+    # Keep a precomputed free-slot snapshot so most availability questions
+    # need no tool call.
+    availability = get_availability()
+    if list_events and shop_user_id:
+        availability.start(list_events, shop_user_id)
+
+    def calendar_prompt(state):
+        now = shop_now()
+        system_prompt = CALENDAR_AGENT_PROMPT.render(
+            today=now.strftime("%Y-%m-%d"),
+            availability=availability.render(now),
+            refreshed_at=availability.refreshed_at and availability.refreshed_at.strftime("%Y-%m-%d %H:%M"),
+        )
+        return [SystemMessage(content=system_prompt)] + state["messages"]
     # Combine with our custom calendar tools
     all_calendar_tools = google_calendar_tools + [calendar_math]
 
     calendar_agent = create_react_agent(
-        model=ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash-preview-05-20",
-        ),
+        model=get_chat_model("calendar"),
         tools=all_calendar_tools,
         name="calendar_agent",
-        prompt=CALENDAR_AGENT_PROMPT.render(today=today),
+        prompt=calendar_prompt,
     )
 
-    # researcher_agent = create_react_agent(
-    #     model=ChatOpenAI(
-    #         model="gpt-4.1",
-    #     ),
-    #     tools=supermemory_client.get_tools(),
-    #     name="researcher_agent",
-    #     prompt=RESEARCHER_AGENT_PROMPT.render()
-    # )
-
-    graph = create_supervisor(
-        [calendar_agent],
-        model=ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash-preview-05-20",
-        ),
-        tools=None,
-        output_mode="last_message",
-        prompt=SUPERVISOR_PROMPT.render(),
+    # Client memories live in an embedded per-client vector index
+    # (agents.base.memory), so lookups need no external service.
+    memory_tools = [fetch_memories, add_memory]
+
+    researcher_agent = create_react_agent(
+        model=get_chat_model("researcher"),
+        tools=memory_tools,
+        name="researcher_agent",
+        prompt=RESEARCHER_AGENT_PROMPT.render()
+    )
+
+    # Memory lookups go through researcher_agent, so the supervisor's turns
+    # are handoffs only and run in parallel.
+    graph = build_supervisor(
+        [calendar_agent, researcher_agent],
+        model=get_chat_model("supervisor"),
     )
     
     yield graph
+
+
+def _handoff_tools(agents):
+    """``transfer_to_*`` tools that only hand off in a turn of their own.
+
+    A handoff ends the supervisor's step by raising a parent ``Command``, so
+    any other tool call in the same turn would run and have its result
+    dropped. When a turn mixes the two, the handoffs answer with a note
+    instead and the model hands off again once the other results are in.
+    """
+    handoffs = [create_handoff_tool(agent_name=agent.name) for agent in agents]
+    names = {handoff.name for handoff in handoffs}
+
+    def defer_when_mixed(handoff):
+        @tool(handoff.name, description=handoff.description)
+        def transfer(
+            state: Annotated[dict, InjectedState],
+            tool_call_id: Annotated[str, InjectedToolCallId],
+        ):
+            calls = state["messages"][-1].tool_calls
+            if any(call["name"] not in names for call in calls):
+                return (
+                    "Not transferred: other tools were called in the same turn. "
+                    "Hand off again in a turn of its own now that their results are in."
+                )
+            return handoff.func(state=state, tool_call_id=tool_call_id)
+
+        transfer.metadata = handoff.metadata
+        return transfer
+
+    return [defer_when_mixed(handoff) for handoff in handoffs]
+
+
+def _clear_reply(state):
+    # structured_response is checkpointed with the thread; drop the last
+    # turn's reply so an answer given as plain text is not shadowed by it
+    return {"structured_response": None}
+
+
+def build_supervisor(agents, model, tools=None):
+    """Wire the supervisor over ``agents``; returns the uncompiled graph.
+
+    Parallel handoffs come from the model itself: Gemini natively emits several
+    ``transfer_to_*`` tool calls in one turn when the prompt asks for it, and
+    each handoff tool answers with a ``Send`` to its agent. The supervisor's
+    tool node must run those calls in a single task so the ``Send``s are merged
+    into one parent command; the prebuilt agent's default (v2) dispatch runs
+    every call as its own task and only one handoff survives. So the
+    supervisor node built by ``create_supervisor`` is swapped for a v1 agent
+    over the same tools. ``parallel_tool_calls`` is not passed because the
+    library only forwards it to models whose ``bind_tools`` names that
+    parameter, which Gemini's and ``HedgedChatModel``'s do not.
+    """
+    from agents.base.tools import reply
+
+    prompt = SUPERVISOR_PROMPT.render()
+    # The final answer is a typed Reply (text, optional button, optional
+    # media) so the WhatsApp channel never has to parse it out of text. The
+    # model sends it as its last tool call, which ends the run without the
+    # extra LLM call a response_format would add.
+    tool_node = ToolNode(list(tools or []) + [reply] + _handoff_tools(agents))
+    workflow = create_supervisor(
+        agents,
+        model=model,
+        tools=tool_node,
+        # Keep structured_response in the outer state, or it never reaches
+        # the channel
+        state_schema=AgentStateWithStructuredResponse,
+        output_mode="last_message",
+        prompt=prompt,
+    )
+
+    # The swap relies on create_supervisor registering its agent as a plain
+    # "supervisor" node spec; fail here rather than run the v2 agent.
+    spec = workflow.nodes.get("supervisor")
+    if not isinstance(spec, StateNodeSpec) or getattr(spec.runnable, "name", None) != "supervisor":
+        raise RuntimeError(
+            "Unsupported langgraph_supervisor version: expected a 'supervisor' node "
+            "to swap for a v1 agent. Check the pin in pyproject.toml."
+        )
+    supervisor = create_react_agent(
+        name="supervisor",
+        model=model,
+        tools=tool_node,
+        prompt=prompt,
+        state_schema=AgentStateWithStructuredResponse,
+        pre_model_hook=_clear_reply,
+        version="v1",
+    )
+    workflow.nodes["supervisor"] = spec._replace(runnable=supervisor)
+    return workflow
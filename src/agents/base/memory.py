@@ -0,0 +1,353 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import weakref
+import zlib
+from collections import OrderedDict
+from functools import partial
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+Embedder = Callable[[List[str]], np.ndarray]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbedder:
+    """Local, dependency-free text embedder based on signed feature hashing.
+
+    Words, word bigrams and character trigrams (so "fade" still matches
+    "fades") are hashed into a fixed-size vector, so embedding needs no model
+    download and no network call. The output rows are L2 normalized, which
+    makes cosine similarity a plain dot product.
+
+    Matching is lexical: a paraphrase that shares no words with the memory
+    ("usual haircut style" for "Usually gets a skin fade") scores poorly.
+    Set ``MEMORY_EMBEDDER=fastembed`` for a local sentence-embedding model.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        tokens = _TOKEN_RE.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for token in tokens:
+            padded = f"<{token}>"
+            features.extend(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                # crc32 is stable across processes, unlike the builtin hash()
+                h = zlib.crc32(feature.encode("utf-8"))
+                rows.append(row)
+                cols.append(h % self.dim)
+                signs.append(1.0 if (h >> 31) & 1 else -1.0)
+
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(vectors, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), signs)
+        return _normalize(vectors)
+
+
+class FastEmbedEmbedder:
+    """Sentence embeddings from a local ONNX model, via the optional ``fastembed`` package.
+
+    The model is downloaded to fastembed's cache on first use; embedding then
+    runs in-process without network calls.
+    """
+
+    DEFAULT_MODEL = "BAAI/bge-small-en-v1.5"
+
+    def __init__(self, model_name: Optional[str] = None):
+        try:
+            from fastembed import TextEmbedding
+        except ImportError as e:
+            raise ImportError(
+                "MEMORY_EMBEDDER=fastembed needs the fastembed package: pip install fastembed"
+            ) from e
+        model_name = model_name or self.DEFAULT_MODEL
+        self.name = f"fastembed:{model_name}"
+        self._model = TextEmbedding(model_name)
+        self.dim = len(next(iter(self._model.embed(["dim"]))))
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        return _normalize(np.array(list(self._model.embed(texts)), dtype=np.float32))
+
+
+def make_embedder(spec: str) -> Embedder:
+    """Build an embedder from ``hashing`` or ``fastembed[:<model name>]``."""
+    kind, _, model_name = spec.partition(":")
+    if kind == "hashing":
+        return HashingEmbedder()
+    if kind == "fastembed":
+        return FastEmbedEmbedder(model_name or None)
+    raise ValueError(f"Unknown memory embedder {spec!r}; use 'hashing' or 'fastembed[:<model>]'")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class ClientMemoryIndex:
+    """Vector index for a single client, persisted in ``path``.
+
+    Layout on disk:
+        vectors.f32   float32 matrix (capacity x dim), memory-mapped
+        texts.jsonl   one memory text per line, append-only
+        meta.json     committed row count, dimension, capacity, texts size
+                      and the embedder that produced the vectors
+
+    Inserts only touch the new rows and lines; ``meta.json`` is rewritten last,
+    so a crash mid-insert leaves the previously committed rows intact.
+    ``close`` releases the memory map; the next ``add`` or ``search`` reopens it
+    and then calls ``on_open`` with the index.
+    """
+
+    INITIAL_CAPACITY = 256
+
+    def __init__(
+        self,
+        path: str,
+        embedder: Embedder,
+        dim: int,
+        on_open: Optional[Callable[["ClientMemoryIndex"], None]] = None,
+    ):
+        self.path = path
+        self.embedder = embedder
+        self.dim = dim
+        self.on_open = on_open
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+        meta = self._read_meta()
+        if meta and meta["dim"] != dim:
+            raise ValueError(
+                f"Memory index at {path} has dim {meta['dim']}, expected {dim}"
+            )
+        # Indexes written before the embedder was recorded used hashing
+        built_with = meta.get("embedder", HashingEmbedder.name) if meta else None
+        self.embedder_name = getattr(embedder, "name", None)
+        if built_with and self.embedder_name and built_with != self.embedder_name:
+            raise ValueError(
+                f"Memory index at {path} was built with the {built_with!r} embedder, "
+                f"not {self.embedder_name!r}; use a new MEMORY_DIR when changing MEMORY_EMBEDDER"
+            )
+        self.embedder_name = self.embedder_name or built_with
+        self.count = meta["count"] if meta else 0
+        self.capacity = meta["capacity"] if meta else self.INITIAL_CAPACITY
+        self._texts_size = meta["texts_size"] if meta else 0
+
+        if not os.path.exists(self._vectors_path):
+            self._allocate(self.capacity)
+        self._vectors: Optional[np.memmap] = None
+        self._opened = False
+        self.texts = self._read_texts()
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.f32")
+
+    @property
+    def _texts_path(self) -> str:
+        return os.path.join(self.path, "texts.jsonl")
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    def _read_meta(self) -> Optional[dict]:
+        if not os.path.exists(self._meta_path):
+            return None
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_meta(self) -> None:
+        tmp_path = f"{self._meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "count": self.count,
+                    "dim": self.dim,
+                    "capacity": self.capacity,
+                    "texts_size": self._texts_size,
+                    "embedder": self.embedder_name,
+                },
+                f,
+            )
+        os.replace(tmp_path, self._meta_path)
+
+    def _read_texts(self) -> List[str]:
+        if not os.path.exists(self._texts_path):
+            return []
+        texts = []
+        with open(self._texts_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if len(texts) == self.count:
+                    break
+                texts.append(json.loads(line))
+        return texts
+
+    def _allocate(self, capacity: int) -> None:
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+
+    def _open_vectors(self) -> np.memmap:
+        if self._vectors is None:
+            self._vectors = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim)
+            )
+            self._opened = True
+        return self._vectors
+
+    def _notify_open(self) -> None:
+        # Called after the index lock is released, so the callback may close
+        # other indexes without lock-order trouble
+        if self._opened:
+            self._opened = False
+            if self.on_open is not None:
+                self.on_open(self)
+
+    def close(self) -> None:
+        """Flush and unmap the vectors file."""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+
+    def _ensure_capacity(self, needed: int) -> None:
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        self._allocate(capacity)
+        self.capacity = capacity
+
+    def add(self, texts: List[str]) -> int:
+        """Embed ``texts`` in one batch and append them to the index."""
+        texts = [t for t in texts if t and t.strip()]
+        if not texts:
+            return 0
+
+        vectors = _normalize(self.embedder(texts))
+        with self._lock:
+            start, end = self.count, self.count + len(texts)
+            self._ensure_capacity(end)
+            matrix = self._open_vectors()
+            matrix[start:end] = vectors
+            matrix.flush()
+
+            payload = "".join(json.dumps(t, ensure_ascii=False) + "\n" for t in texts).encode("utf-8")
+            with open(self._texts_path, "ab") as f:
+                # Drop bytes left behind by an insert that never committed
+                f.truncate(self._texts_size)
+                f.write(payload)
+            self._texts_size += len(payload)
+
+            self.texts.extend(texts)
+            self.count = end
+            self._write_meta()
+        self._notify_open()
+        return len(texts)
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[str, float]]:
+        """Return up to ``k`` ``(text, cosine_score)`` pairs, best first."""
+        if not query or self.count == 0 or k <= 0:
+            return []
+
+        query_vector = _normalize(self.embedder([query]))[0]
+        with self._lock:
+            count = self.count
+            scores = self._open_vectors()[:count] @ query_vector
+            k = min(k, count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            results = [(self.texts[i], float(scores[i])) for i in top]
+        self._notify_open()
+        return results
+
+
+class ClientMemoryStore:
+    """Directory of per-client ``ClientMemoryIndex`` instances.
+
+    At most ``max_open`` indexes keep their memory map open: every index
+    reports when it maps its vectors, and the least recently used ones are
+    closed, so idle clients do not hold a file descriptor each. The store only
+    keeps the open indexes alive; an idle one (and its texts) is freed once
+    nothing else references it and is read back from disk on next use.
+    """
+
+    def __init__(self, root: str, embedder: Optional[Embedder] = None, dim: int = 512, max_open: int = 128):
+        self.root = root
+        self.embedder = embedder or HashingEmbedder(dim)
+        self.dim = getattr(self.embedder, "dim", dim)
+        self.max_open = max_open
+        self._indexes: "weakref.WeakValueDictionary[str, ClientMemoryIndex]" = weakref.WeakValueDictionary()
+        self._open: "OrderedDict[str, ClientMemoryIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, client_id: str) -> str:
+        # Client ids are phone numbers like "whatsapp:+1555..."; hash them so
+        # they are safe to use as directory names.
+        return os.path.join(self.root, hashlib.sha1(client_id.encode("utf-8")).hexdigest())
+
+    def get(self, client_id: str, create: bool = True) -> Optional[ClientMemoryIndex]:
+        """Return the client's index, or ``None`` if it has none and ``create`` is false."""
+        with self._lock:
+            index = self._indexes.get(client_id)
+            if index is None:
+                path = self._path(client_id)
+                if not create and not os.path.exists(os.path.join(path, "meta.json")):
+                    return None
+                index = ClientMemoryIndex(path, self.embedder, self.dim, on_open=partial(self._opened, client_id))
+                self._indexes[client_id] = index
+            return index
+
+    def _opened(self, client_id: str, index: ClientMemoryIndex) -> None:
+        with self._lock:
+            self._open[client_id] = index
+            self._open.move_to_end(client_id)
+            idle = []
+            while len(self._open) > self.max_open:
+                idle.append(self._open.popitem(last=False)[1])
+        for stale in idle:
+            stale.close()
+
+    def add(self, client_id: str, texts: List[str]) -> int:
+        return self.get(client_id).add(texts)
+
+    def search(self, client_id: str, query: str, k: int = 5) -> List[Tuple[str, float]]:
+        index = self.get(client_id, create=False)
+        return index.search(query, k) if index is not None else []
+
+
+_STORE: Optional[ClientMemoryStore] = None
+
+
+def get_memory_store() -> ClientMemoryStore:
+    """Return the process-wide memory store rooted at ``MEMORY_DIR``.
+
+    ``MEMORY_EMBEDDER`` picks the embedder (see ``make_embedder``).
+    """
+    global _STORE
+    if _STORE is None:
+        _STORE = ClientMemoryStore(
+            os.getenv("MEMORY_DIR") or ".memory",
+            embedder=make_embedder(os.getenv("MEMORY_EMBEDDER") or "hashing"),
+        )
+    return _STORE
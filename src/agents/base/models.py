@@ -0,0 +1,294 @@
+import asyncio
+import bisect
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.callbacks import (
+    AsyncCallbackManager,
+    AsyncCallbackManagerForLLMRun,
+    CallbackManager,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_openai import ChatOpenAI
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gemini-2.5-flash-preview-05-20"
+
+# Per-role model tiers. Each role can be overridden with <ROLE>_MODEL and
+# <ROLE>_BACKUP_MODEL, e.g. CALENDAR_MODEL=openai:gpt-4.1-mini.
+MODEL_TIERS = {
+    "supervisor": {"model": DEFAULT_MODEL, "backup": None},
+    "calendar": {"model": DEFAULT_MODEL, "backup": None},
+    "researcher": {"model": DEFAULT_MODEL, "backup": None},
+}
+
+# Latency histogram bucket upper bounds, in seconds
+_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+
+
+class LatencyStats:
+    """Latency histogram plus a rolling window for percentiles, per key.
+
+    ``HedgedChatModel`` records under ``"<role>/<model>"``, so the same model
+    serving two roles (with different prompt sizes) is tracked separately.
+    """
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, List[int]] = {}
+        self._errors: Dict[str, int] = {}
+        self._recent: Dict[str, deque] = {}
+        self._window = window
+
+    def record(self, key: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            if error:
+                self._errors[key] = self._errors.get(key, 0) + 1
+                return
+            counts = self._counts.setdefault(key, [0] * (len(_BUCKETS) + 1))
+            counts[bisect.bisect_left(_BUCKETS, seconds)] += 1
+            self._recent.setdefault(key, deque(maxlen=self._window)).append(seconds)
+
+    def percentile(self, key: str, q: float, min_samples: int = 20) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._recent.get(key, ()))
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def report(self) -> Dict[str, Any]:
+        """Return histogram buckets, percentiles and error counts per key."""
+        with self._lock:
+            keys = set(self._counts) | set(self._errors)
+            counts = {k: list(self._counts.get(k, [])) for k in keys}
+            errors = dict(self._errors)
+        report = {}
+        for key in sorted(keys):
+            labels = [f"le_{b}s" for b in _BUCKETS] + ["inf"]
+            report[key] = {
+                "histogram": dict(zip(labels, counts[key] or [0] * len(labels))),
+                "p50": self.percentile(key, 0.50, min_samples=1),
+                "p95": self.percentile(key, 0.95, min_samples=1),
+                "errors": errors.get(key, 0),
+            }
+        return report
+
+
+LATENCY = LatencyStats()
+
+
+class HedgedChatModel(BaseChatModel):
+    """Chat model that hedges a slow primary call with a backup call.
+
+    The primary request is sent first. If it has not answered after the
+    primary model's observed p95 latency for this ``role`` (or ``hedge_after``
+    until enough samples exist), a backup request is sent to ``backup`` (or
+    the primary again when no backup is configured) and the first answer wins.
+    If the primary fails, the backup is used as a fallback. The whole call is
+    bounded by ``latency_budget`` seconds.
+
+    Inner calls run as children of this run, so traces and callbacks see them,
+    and get ``stop`` and any call kwargs unchanged.
+    """
+
+    primary: Runnable
+    backup: Optional[Runnable] = None
+    primary_name: str
+    backup_name: Optional[str] = None
+    role: str = "default"
+    latency_budget: float = 30.0
+    hedge_after: float = 10.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged-chat-model"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "HedgedChatModel":
+        return self.model_copy(update={
+            "primary": self.primary.bind_tools(tools, **kwargs),
+            "backup": self.backup.bind_tools(tools, **kwargs) if self.backup else None,
+        })
+
+    def _latency_key(self, name: str) -> str:
+        return f"{self.role}/{name}"
+
+    def _hedge_delay(self) -> float:
+        p95 = LATENCY.percentile(self._latency_key(self.primary_name), 0.95)
+        return min(p95 if p95 is not None else self.hedge_after, self.latency_budget)
+
+    def _backup(self) -> tuple:
+        if self.backup is not None:
+            return self.backup, self.backup_name
+        return self.primary, self.primary_name
+
+    def _timed_invoke(self, model: Runnable, name: str, messages, config: RunnableConfig, **kwargs: Any) -> BaseMessage:
+        start = time.perf_counter()
+        try:
+            result = model.invoke(messages, config, **kwargs)
+        except Exception:
+            LATENCY.record(self._latency_key(name), time.perf_counter() - start, error=True)
+            raise
+        LATENCY.record(self._latency_key(name), time.perf_counter() - start)
+        return result
+
+    async def _atimed_invoke(self, model: Runnable, name: str, messages, config: RunnableConfig, **kwargs: Any) -> BaseMessage:
+        start = time.perf_counter()
+        try:
+            result = await model.ainvoke(messages, config, **kwargs)
+        except asyncio.CancelledError:
+            # The losing request is cancelled. Its latency is at least the
+            # time it ran, so keep that as a sample; dropping it would pull
+            # the p95 (and so the hedge delay) down
+            LATENCY.record(self._latency_key(name), time.perf_counter() - start)
+            raise
+        except Exception:
+            LATENCY.record(self._latency_key(name), time.perf_counter() - start, error=True)
+            raise
+        LATENCY.record(self._latency_key(name), time.perf_counter() - start)
+        return result
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        deadline = time.monotonic() + self.latency_budget
+        backup, backup_name = self._backup()
+        config = _child_config(run_manager)
+        if stop is not None:
+            kwargs["stop"] = stop
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            pending = {executor.submit(self._timed_invoke, self.primary, self.primary_name, messages, config, **kwargs)}
+            done, pending = wait(pending, timeout=self._hedge_delay())
+            message = next((f.result() for f in done if f.exception() is None), None)
+            if message is None:
+                if done:
+                    LOGGER.warning("Primary model %s failed, falling back to %s", self.primary_name, backup_name)
+                else:
+                    LOGGER.info("Hedging slow %s call with %s", self.primary_name, backup_name)
+                pending.add(executor.submit(self._timed_invoke, backup, backup_name, messages, config, **kwargs))
+                message = self._first_result(pending, deadline)
+        finally:
+            # Do not wait for the losing request
+            executor.shutdown(wait=False, cancel_futures=True)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _first_result(self, pending: set, deadline: float) -> BaseMessage:
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                raise TimeoutError(f"No model answered within {self.latency_budget}s")
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        deadline = time.monotonic() + self.latency_budget
+        backup, backup_name = self._backup()
+        config = _child_config(run_manager)
+        if stop is not None:
+            kwargs["stop"] = stop
+
+        pending = {asyncio.create_task(self._atimed_invoke(self.primary, self.primary_name, messages, config, **kwargs))}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self._hedge_delay())
+            message = next((t.result() for t in done if t.exception() is None), None)
+            if message is None:
+                if done:
+                    LOGGER.warning("Primary model %s failed, falling back to %s", self.primary_name, backup_name)
+                else:
+                    LOGGER.info("Hedging slow %s call with %s", self.primary_name, backup_name)
+                pending.add(asyncio.create_task(self._atimed_invoke(backup, backup_name, messages, config, **kwargs)))
+                message = await self._afirst_result(pending, deadline)
+        finally:
+            for task in pending:
+                task.cancel()
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _afirst_result(self, pending: set, deadline: float) -> BaseMessage:
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=max(0.0, deadline - time.monotonic()), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                raise TimeoutError(f"No model answered within {self.latency_budget}s")
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+
+
+def _child_config(run_manager) -> RunnableConfig:
+    """Config nesting the inner model calls under the hedged run.
+
+    LLM run managers have no ``get_child``, so this mirrors the one on chain
+    and tool run managers. The children are tagged ``nostream`` so LangGraph's
+    message stream only emits the hedged model's answer, not each attempt.
+    """
+    if run_manager is None:
+        return {}
+    manager_cls = AsyncCallbackManager if isinstance(run_manager, AsyncCallbackManagerForLLMRun) else CallbackManager
+    manager = manager_cls(handlers=[], parent_run_id=run_manager.run_id)
+    manager.set_handlers(run_manager.inheritable_handlers)
+    manager.add_tags(run_manager.inheritable_tags)
+    manager.add_metadata(run_manager.inheritable_metadata)
+    manager.add_tags(["nostream"], inherit=False)
+    return {"callbacks": manager}
+
+
+def _make_chat_model(spec: str, timeout: float) -> BaseChatModel:
+    """Build a chat model from ``provider:name`` (provider defaults to Google)."""
+    provider, sep, name = spec.partition(":")
+    if not sep:
+        provider, name = "google", spec
+    if provider == "openai":
+        return ChatOpenAI(model=name, timeout=timeout)
+    if provider == "google":
+        return ChatGoogleGenerativeAI(model=name, timeout=timeout)
+    raise ValueError(f"Unknown model provider {provider!r} in {spec!r}; use 'google' or 'openai'")
+
+
+def get_chat_model(role: str) -> HedgedChatModel:
+    """Return the hedged chat model configured for ``role`` (see ``MODEL_TIERS``)."""
+    tier = MODEL_TIERS[role]
+    prefix = role.upper()
+    model = os.getenv(f"{prefix}_MODEL") or tier["model"]
+    backup = os.getenv(f"{prefix}_BACKUP_MODEL") or tier["backup"]
+    budget = float(os.getenv("LLM_LATENCY_BUDGET_SECONDS") or 30)
+    hedge_after = float(os.getenv("LLM_HEDGE_AFTER_SECONDS") or budget / 3)
+
+    return HedgedChatModel(
+        primary=_make_chat_model(model, budget),
+        backup=_make_chat_model(backup, budget) if backup else None,
+        primary_name=model,
+        backup_name=backup,
+        role=role,
+        latency_budget=budget,
+        hedge_after=hedge_after,
+    )
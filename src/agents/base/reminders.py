@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from agents.base.availability import shop_timezone
+
+LOGGER = logging.getLogger(__name__)
+
+PENDING, SENDING, SENT, FAILED, EXPIRED = "pending", "sending", "sent", "failed", "expired"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id    TEXT NOT NULL UNIQUE,
+    to_number   TEXT NOT NULL,
+    starts_at   REAL NOT NULL,
+    remind_at   REAL NOT NULL,
+    variables   TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    attempts    INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS reminders_pending
+    ON reminders (status, remind_at);
+"""
+
+
+class ReminderStore:
+    """SQLite-backed reminder queue shared by the graph and the webhook server.
+
+    The graph process enqueues reminders when an appointment is created and the
+    server process dispatches them, so the database is the only shared state.
+    Each call opens its own short-lived connection, which keeps the store safe
+    to use from any thread.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("REMINDERS_DB") or "reminders.sqlite3"
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def add(self, event_id: str, to_number: str, starts_at: float, remind_at: float, variables: dict) -> bool:
+        """Queue a reminder. Returns False if the event already has one.
+
+        ``variables`` are the content variables of the reminder template.
+        """
+        with closing(self._connect()) as conn, conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO reminders (event_id, to_number, starts_at, remind_at, variables) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (event_id, to_number, starts_at, remind_at, json.dumps(variables, ensure_ascii=False)),
+            )
+            return cur.rowcount == 1
+
+    def pending_until(self, horizon: float) -> List[tuple]:
+        """Return ``(id, remind_at)`` for unsent reminders due before ``horizon``.
+
+        Includes reminders claimed by a dispatcher whose claim has run out.
+        """
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT id, remind_at FROM reminders WHERE status IN (?, ?) AND remind_at <= ?",
+                (PENDING, SENDING, horizon),
+            ).fetchall()
+
+    def claim(self, ids: Iterable[int], now: float, lease: float = 300.0) -> List[sqlite3.Row]:
+        """Claim the due reminders among ``ids`` for sending and return them.
+
+        A claim moves the reminder to ``sending`` and pushes ``remind_at``
+        ``lease`` seconds out. The update only matches due rows that are
+        pending or whose claim has run out, so with several workers or
+        replicas on one database each reminder is sent by one of them. A
+        dispatcher that dies mid-send leaves its claim to run out and the
+        reminder is picked up again.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.row_factory = sqlite3.Row
+            claimed = [
+                reminder_id for reminder_id in ids
+                if conn.execute(
+                    "UPDATE reminders SET status = ?, remind_at = ? "
+                    "WHERE id = ? AND status IN (?, ?) AND remind_at <= ?",
+                    (SENDING, now + lease, reminder_id, PENDING, SENDING, now),
+                ).rowcount == 1
+            ]
+            if not claimed:
+                return []
+            placeholders = ",".join("?" * len(claimed))
+            return conn.execute(
+                f"SELECT * FROM reminders WHERE id IN ({placeholders})", claimed
+            ).fetchall()
+
+    def get_many(self, ids: Iterable[int]) -> List[sqlite3.Row]:
+        ids = list(ids)
+        if not ids:
+            return []
+        with closing(self._connect()) as conn:
+            conn.row_factory = sqlite3.Row
+            placeholders = ",".join("?" * len(ids))
+            return conn.execute(
+                f"SELECT * FROM reminders WHERE status = ? AND id IN ({placeholders})",
+                (PENDING, *ids),
+            ).fetchall()
+
+    def mark(self, updates: Iterable[tuple]) -> None:
+        """Apply ``(status, attempts, remind_at, id)`` updates in one transaction."""
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "UPDATE reminders SET status = ?, attempts = ?, remind_at = ? WHERE id = ?",
+                updates,
+            )
+
+
+def _parse_datetime(value: str) -> datetime:
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    # Naive datetimes are the shop's wall-clock time; the reminder text is
+    # always given in the shop's timezone
+    return dt.astimezone(shop_timezone()) if dt.tzinfo else dt.replace(tzinfo=shop_timezone())
+
+
+def schedule_from_event(store: ReminderStore, to_number: str, result, lead_minutes: Optional[int] = None) -> bool:
+    """Queue a reminder from a ``Google_CreateEvent`` tool result.
+
+    ``result`` may be the raw dict returned by the tool or its JSON string.
+    Results that do not look like a created event are ignored. The reminder
+    template gets the appointment date as ``{{1}}`` and its time as ``{{2}}``.
+    """
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except json.JSONDecodeError:
+            return False
+    if not isinstance(result, dict):
+        return False
+
+    event = result.get("event", result)
+    start = event.get("start") or {}
+    start_value = start.get("dateTime") if isinstance(start, dict) else start
+    event_id = event.get("id")
+    if not (event_id and start_value):
+        return False
+
+    try:
+        starts = _parse_datetime(start_value)
+    except ValueError:
+        LOGGER.warning("Unparseable event start %r for event %s", start_value, event_id)
+        return False
+
+    if lead_minutes is None:
+        lead_minutes = int(os.getenv("REMINDER_LEAD_MINUTES") or 120)
+    starts_at = starts.timestamp()
+    variables = {"1": starts.strftime("%A %B %d"), "2": starts.strftime("%H:%M")}
+    return store.add(event_id, to_number, starts_at, starts_at - lead_minutes * 60, variables)
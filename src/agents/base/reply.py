@@ -0,0 +1,31 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+
+class Button(BaseModel):
+    """A tappable link button shown under the WhatsApp message."""
+
+    text: str = Field(description="Button label, 25 characters or less")
+    url: str = Field(description="Link opened by the button, e.g. an authorization URL")
+
+    @field_validator("text")
+    @classmethod
+    def _fit_label(cls, value: str) -> str:
+        # WhatsApp caps button labels at 25 characters; trim an over-long
+        # label rather than fail the whole reply
+        return value if len(value) <= 25 else value[:24].rstrip() + "…"
+
+
+class Reply(BaseModel):
+    """The supervisor's final message to the client."""
+
+    text: str = Field(description="Message shown to the client")
+    button: Optional[Button] = Field(
+        default=None,
+        description="Optional button for important actions like authorization links or confirmations",
+    )
+    media_url: Optional[str] = Field(
+        default=None,
+        description="Optional public URL of an image to attach to the message",
+    )
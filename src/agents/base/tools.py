@@ -1,7 +1,20 @@
 from langchain.tools import tool
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool, InjectedToolCallId, StructuredTool
+from langgraph.types import Command
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Union, Literal, Optional, Any, TypedDict
+from typing import Annotated, Callable, Dict, List, Union, Literal, Optional, Any, TypedDict
+import asyncio
 import json
+import logging
+
+from agents.base.availability import get_availability, parse_busy_intervals
+from agents.base.memory import get_memory_store
+from agents.base.reminders import ReminderStore, schedule_from_event
+from agents.base.reply import Button, Reply
+
+LOGGER = logging.getLogger(__name__)
 
 
 class AddTimeParams(TypedDict, total=False):
@@ -155,3 +168,254 @@ def calendar_math(
             "error": f"Error processing time calculation: {str(e)}"
         })
 
+
+
+def _client_id(config: RunnableConfig) -> Optional[str]:
+    # Memories are keyed by the client's WhatsApp number. Runs without one
+    # (e.g. from LangGraph Studio) get no memories rather than a shared bucket.
+    return ((config or {}).get("configurable") or {}).get("user_id")
+
+
+_NO_CLIENT = json.dumps({"error": "No client is identified for this run (missing user_id); memories are unavailable."})
+
+
+@tool
+def fetch_memories(query: str, config: RunnableConfig, k: int = 5) -> str:
+    """
+    Retrieves the stored memories about the current client that best match a query.
+
+    Args:
+        query: What to look for (e.g. "preferred days and times", "usual haircut style")
+        k: Maximum number of memories to return
+
+    Returns:
+        JSON with a list of memories and their similarity scores, best match first
+    """
+    client_id = _client_id(config)
+    if not client_id:
+        return _NO_CLIENT
+    results = get_memory_store().search(client_id, query, k=k)
+    return json.dumps({
+        "memories": [{"text": text, "score": round(score, 3)} for text, score in results]
+    })
+
+
+@tool
+def add_memory(memories: List[str], config: RunnableConfig) -> str:
+    """
+    Stores new facts about the current client (preferences, history, constraints).
+
+    Args:
+        memories: One short, self-contained sentence per fact,
+            e.g. ["Prefers Friday evenings", "Usually gets a skin fade"]
+
+    Returns:
+        JSON with the number of memories stored
+    """
+    client_id = _client_id(config)
+    if not client_id:
+        return _NO_CLIENT
+    stored = get_memory_store().add(client_id, memories)
+    return json.dumps({"stored": stored})
+
+
+class _ReplyCall(Reply):
+    tool_call_id: Annotated[str, InjectedToolCallId]
+
+
+@tool("Reply", args_schema=_ReplyCall, return_direct=True)
+def reply(
+    text: str,
+    tool_call_id: str,
+    button: Optional[Button] = None,
+    media_url: Optional[str] = None,
+) -> Command:
+    """
+    Sends the final message to the client and ends the turn. Call it once,
+    on its own, as the last step.
+    """
+    answer = Reply(text=text, button=button, media_url=media_url)
+    return Command(update={
+        "structured_response": answer,
+        "messages": [ToolMessage(content=answer.text, name="Reply", tool_call_id=tool_call_id)],
+    })
+
+
+def _after_tool(wrapped: BaseTool, callback: Callable[[Any, RunnableConfig], None]) -> BaseTool:
+    """
+    Returns a copy of ``wrapped`` (same name, description and arguments) that
+    calls ``callback(result, config)`` after each successful run. Callback
+    errors are logged and never change the tool result. In async runs the
+    callback runs in a worker thread, so blocking I/O in it does not stall
+    the event loop.
+    """
+    def _callback(result: Any, config: RunnableConfig) -> None:
+        try:
+            callback(result, config)
+        except Exception as e:
+            LOGGER.error("Post-tool hook for %s failed: %s", wrapped.name, e)
+
+    def _run(config: RunnableConfig, **kwargs: Any) -> Any:
+        result = wrapped.invoke(kwargs, config)
+        _callback(result, config)
+        return result
+
+    async def _arun(config: RunnableConfig, **kwargs: Any) -> Any:
+        result = await wrapped.ainvoke(kwargs, config)
+        await asyncio.to_thread(_callback, result, config)
+        return result
+
+    return StructuredTool(
+        name=wrapped.name,
+        description=wrapped.description,
+        args_schema=wrapped.args_schema,
+        func=_run,
+        coroutine=_arun,
+    )
+
+
+def run_as(wrapped: BaseTool, user_id: str) -> BaseTool:
+    """
+    Returns a copy of ``wrapped`` that always runs with
+    ``configurable.user_id`` set to ``user_id``. Used to run the Arcade
+    calendar tools under the shop's identity, whoever sent the message. Hooks
+    added around the copy still see the caller's own config.
+    """
+    def _config(config: RunnableConfig) -> RunnableConfig:
+        return {**config, "configurable": {**config.get("configurable", {}), "user_id": user_id}}
+
+    def _run(config: RunnableConfig, **kwargs: Any) -> Any:
+        return wrapped.invoke(kwargs, _config(config))
+
+    async def _arun(config: RunnableConfig, **kwargs: Any) -> Any:
+        return await wrapped.ainvoke(kwargs, _config(config))
+
+    return StructuredTool(
+        name=wrapped.name,
+        description=wrapped.description,
+        args_schema=wrapped.args_schema,
+        func=_run,
+        coroutine=_arun,
+    )
+
+
+def with_appointment_reminders(create_event_tool: BaseTool) -> BaseTool:
+    """
+    Wraps the ``Google_CreateEvent`` tool so every created appointment queues a
+    WhatsApp reminder for the client who booked it. Runs without a
+    ``user_id`` (e.g. from LangGraph Studio) have no number to remind, so
+    nothing is queued for them.
+    """
+    store = ReminderStore()
+
+    def schedule(result: Any, config: RunnableConfig) -> None:
+        to_number = (config or {}).get("configurable", {}).get("user_id")
+        if not to_number:
+            LOGGER.warning("Not scheduling a reminder: the run has no user_id")
+            return
+        schedule_from_event(store, to_number, result)
+
+    return _after_tool(create_event_tool, schedule)
+
+
+def with_availability_refresh(create_event_tool: BaseTool) -> BaseTool:
+    """
+    Wraps the ``Google_CreateEvent`` tool so the availability snapshot drops
+    the booked slot immediately and refreshes from the calendar.
+    """
+    return _after_tool(
+        create_event_tool,
+        lambda result, config: get_availability().record_booking(result),
+    )
+
+
+def _created_event(result: Any) -> Optional[dict]:
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except json.JSONDecodeError:
+            return None
+    event = result.get("event", result) if isinstance(result, dict) else None
+    return event if isinstance(event, dict) else None
+
+
+def with_conflict_check(create_event_tool: BaseTool, list_events_tool: BaseTool) -> BaseTool:
+    """
+    Wraps the ``Google_CreateEvent`` tool so a booking that overlaps another
+    event comes back with a ``conflicts`` list. The agent books straight from
+    the availability snapshot, which misses events created since its last
+    refresh; this reports the double booking while the client is still in the
+    conversation. If the check itself fails, the result is returned as is.
+    """
+    def _query(result: Any) -> Optional[tuple]:
+        event = _created_event(result)
+        intervals = parse_busy_intervals({"events": [event]}) if event else []
+        if not intervals:
+            return None
+        start, end = intervals[0]
+        return event, start, end, {
+            "min_end_datetime": start.isoformat(),
+            "max_start_datetime": end.isoformat(),
+            "max_results": 50,
+        }
+
+    def _report(result: Any, event: dict, start: datetime, end: datetime, listed: Any) -> Any:
+        events = listed.get("events", []) if isinstance(listed, dict) else listed
+        conflicts = []
+        for other in events or []:
+            if other.get("id") == event.get("id"):
+                continue
+            for other_start, other_end in parse_busy_intervals({"events": [other]}):
+                if other_start < end and start < other_end:
+                    conflicts.append({
+                        "summary": other.get("summary"),
+                        "start": other_start.isoformat(),
+                        "end": other_end.isoformat(),
+                    })
+        if not conflicts:
+            return result
+        LOGGER.warning("Booking %s overlaps %d event(s)", event.get("id"), len(conflicts))
+        report = {
+            **(json.loads(result) if isinstance(result, str) else result),
+            "conflicts": conflicts,
+            "warning": "The new appointment overlaps the events in `conflicts`.",
+        }
+        return json.dumps(report) if isinstance(result, str) else report
+
+    def _run(config: RunnableConfig, **kwargs: Any) -> Any:
+        result = create_event_tool.invoke(kwargs, config)
+        query = _query(result)
+        if query is None:
+            return result
+        event, start, end, args = query
+        try:
+            listed = list_events_tool.invoke(args, config)
+            if isinstance(listed, str):
+                listed = json.loads(listed)
+        except Exception as e:
+            LOGGER.error("Conflict check for %s failed: %s", event.get("id"), e)
+            return result
+        return _report(result, event, start, end, listed)
+
+    async def _arun(config: RunnableConfig, **kwargs: Any) -> Any:
+        result = await create_event_tool.ainvoke(kwargs, config)
+        query = _query(result)
+        if query is None:
+            return result
+        event, start, end, args = query
+        try:
+            listed = await list_events_tool.ainvoke(args, config)
+            if isinstance(listed, str):
+                listed = json.loads(listed)
+        except Exception as e:
+            LOGGER.error("Conflict check for %s failed: %s", event.get("id"), e)
+            return result
+        return _report(result, event, start, end, listed)
+
+    return StructuredTool(
+        name=create_event_tool.name,
+        description=create_event_tool.description,
+        args_schema=create_event_tool.args_schema,
+        func=_run,
+        coroutine=_arun,
+    )
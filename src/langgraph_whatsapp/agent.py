@@ -1,12 +1,60 @@
+import asyncio
 import logging
+from contextlib import AsyncExitStack
 from langgraph_sdk import get_client
 from langgraph_whatsapp import config
+# Relative on purpose: the server imports this package as src.langgraph_whatsapp,
+# and the correlation id must come from the same log module it sets it on
+from .log import CORRELATION_ID
 import json
 import uuid
 
 LOGGER = logging.getLogger(__name__)
 
 
+def _thread_id(id: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, id))
+
+
+def _message_content(user_message: str, images: list = None) -> list:
+    # Build message content - always use a list for consistent format
+    message_content = []
+    if user_message:
+        message_content.append({
+            "type": "text",
+            "text": user_message
+        })
+
+    if images:
+        for img in images:
+            if isinstance(img, dict) and "image_url" in img:
+                message_content.append({
+                    "type": "image_url",
+                    "image_url": img["image_url"]
+                })
+    return message_content
+
+
+def _reply_from_state(state: dict) -> dict:
+    """Return the run's structured reply as a ``{text, button, media_url}`` dict.
+
+    The supervisor's ``Reply`` tool leaves a typed ``Reply`` in
+    ``structured_response``. Over HTTP it arrives as a dict, in-process as the
+    pydantic model. Runs that end in plain text fall back to the last message.
+    """
+    reply = state.get("structured_response")
+    if reply is not None:
+        return reply.model_dump() if hasattr(reply, "model_dump") else dict(reply)
+
+    message = state["messages"][-1]
+    content = message["content"] if isinstance(message, dict) else message.content
+    if isinstance(content, list):
+        content = "".join(
+            part.get("text", "") if isinstance(part, dict) else str(part) for part in content
+        )
+    return {"text": content, "button": None, "media_url": None}
+
+
 class Agent:
     def __init__(self):
         self.client = get_client(url=config.LANGGRAPH_URL)
@@ -15,7 +63,7 @@ class Agent:
                 json.loads(config.CONFIG) if isinstance(config.CONFIG, str) else config.CONFIG
             )
         except json.JSONDecodeError as e:
-            LOGGER.error(f"Failed to parse CONFIG as JSON: {e}")
+            LOGGER.error("Failed to parse CONFIG as JSON: %s", e)
             raise
 
     async def invoke(self, id: str, user_message: str, images: list = None) -> dict:
@@ -28,29 +76,15 @@ class Agent:
             images: List of dictionaries with image data
             
         Returns:
-            dict: The result from the LangGraph run
+            dict: The structured reply (``text``, ``button``, ``media_url``)
         """
-        LOGGER.info(f"Invoking agent with thread_id: {id}")
+        LOGGER.info("Invoking agent", extra={"sender": id})
 
         try:
-            # Build message content - always use a list for consistent format
-            message_content = []
-            if user_message:
-                message_content.append({
-                    "type": "text",
-                    "text": user_message
-                })
+            message_content = _message_content(user_message, images)
 
-            if images:
-                for img in images:
-                    if isinstance(img, dict) and "image_url" in img:
-                        message_content.append({
-                            "type": "image_url",
-                            "image_url": img["image_url"]
-                        })
-            
             request_payload = {
-                "thread_id": str(uuid.uuid5(uuid.NAMESPACE_DNS, id)),
+                "thread_id": _thread_id(id),
                 "assistant_id": config.ASSISTANT_ID,
                 "input": {
                     "messages": [
@@ -61,9 +95,9 @@ class Agent:
                     ]
                 },
                 "config":{
-                    "user_id": id,
+                    "configurable": {"user_id": id},
                 },
-                "metadata": {"event": "api_call"},
+                "metadata": {"event": "api_call", "correlation_id": CORRELATION_ID.get()},
                 "multitask_strategy": "interrupt",
                 "if_not_exists": "create",
                 "stream_mode": "values",
@@ -73,8 +107,108 @@ class Agent:
             async for chunk in self.client.runs.stream(**request_payload):
                 final_response = chunk
             
-            return final_response.data["messages"][-1]["content"]
+            return _reply_from_state(final_response.data)
         except Exception as e:
-            LOGGER.error(f"Error during invoke: {str(e)}", exc_info=True)
+            LOGGER.error("Error during invoke: %s", e, exc_info=True)
             raise
-    
\ No newline at end of file
+
+
+class InProcessAgent:
+    """Runs the graph from ``build_agent`` in this process.
+
+    Skips the HTTP hop to the LangGraph server: the graph is compiled once with
+    a SQLite checkpointer and invoked directly. Threads use the same ids as
+    ``Agent`` and ``invoke`` has the same interface. Runs on the same thread
+    are serialized, which stands in for the server's ``interrupt`` strategy;
+    a thread's lock is dropped once no run holds or waits for it.
+    """
+
+    def __init__(self, checkpoint_db: str = None):
+        self.checkpoint_db = checkpoint_db or config.CHECKPOINT_DB
+        try:
+            self.graph_config = (
+                json.loads(config.CONFIG) if isinstance(config.CONFIG, str) else config.CONFIG
+            )
+        except json.JSONDecodeError as e:
+            LOGGER.error("Failed to parse CONFIG as JSON: %s", e)
+            raise
+        self.graph = None
+        self._stack = AsyncExitStack()
+        self._init_lock = asyncio.Lock()
+        # thread_id -> [lock, number of runs holding or waiting for it]
+        self._thread_locks = {}
+
+    async def _get_graph(self):
+        async with self._init_lock:
+            if self.graph is None:
+                from agents.base.graph import build_agent
+                from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+                checkpointer = await self._stack.enter_async_context(
+                    AsyncSqliteSaver.from_conn_string(self.checkpoint_db)
+                )
+                builder = await self._stack.enter_async_context(build_agent())
+                self.graph = builder.compile(checkpointer=checkpointer)
+                LOGGER.info("Compiled in-process graph", extra={"checkpoint_db": self.checkpoint_db})
+        return self.graph
+
+    async def aclose(self) -> None:
+        await self._stack.aclose()
+        self.graph = None
+
+    async def invoke(self, id: str, user_message: str, images: list = None) -> dict:
+        """
+        Process a user message through the in-process graph.
+
+        Args:
+            id: The unique identifier for the conversation
+            user_message: The message content from the user
+            images: List of dictionaries with image data
+
+        Returns:
+            dict: The structured reply (``text``, ``button``, ``media_url``)
+        """
+        thread_id = _thread_id(id)
+        LOGGER.info("Invoking in-process agent", extra={"sender": id})
+
+        try:
+            graph = await self._get_graph()
+            run_config = {
+                **self.graph_config,
+                "configurable": {
+                    **self.graph_config.get("configurable", {}),
+                    "thread_id": thread_id,
+                    "user_id": id,
+                },
+                "metadata": {"event": "api_call", "correlation_id": CORRELATION_ID.get()},
+            }
+            graph_input = {
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": _message_content(user_message, images)
+                    }
+                ]
+            }
+
+            entry = self._thread_locks.setdefault(thread_id, [asyncio.Lock(), 0])
+            entry[1] += 1
+            try:
+                async with entry[0]:
+                    result = await graph.ainvoke(graph_input, run_config)
+            finally:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._thread_locks[thread_id]
+
+            return _reply_from_state(result)
+        except Exception as e:
+            LOGGER.error("Error during invoke: %s", e, exc_info=True)
+            raise
+
+
+def create_agent():
+    """Return the agent for ``LANGGRAPH_MODE`` ("remote" or "local")."""
+    if config.LANGGRAPH_MODE == "local":
+        return InProcessAgent()
+    return Agent()
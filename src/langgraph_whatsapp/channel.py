@@ -9,8 +9,9 @@ from fastapi import Request, HTTPException
 from twilio.rest import Client
 from twilio.twiml.messaging_response import MessagingResponse
 
-from src.langgraph_whatsapp.agent import Agent
+from src.langgraph_whatsapp.agent import create_agent
 from src.langgraph_whatsapp.config import (
+    AUTH_TEMPLATE_SID,
     TWILIO_ACCOUNT_SID,
     TWILIO_AUTH_TOKEN,
     TWILIO_PHONE_NUMBER,
@@ -24,7 +25,7 @@ def twilio_url_to_data_uri(url: str, content_type: str = None) -> str:
     if not (TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN):
         raise RuntimeError("Twilio credentials are missing")
 
-    LOGGER.info(f"Downloading image from Twilio URL: {url}")
+    LOGGER.info("Downloading image from Twilio", extra={"url": url})
     resp = requests.get(url, auth=(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN), timeout=20)
     resp.raise_for_status()
 
@@ -33,7 +34,7 @@ def twilio_url_to_data_uri(url: str, content_type: str = None) -> str:
 
     # Ensure we have a proper image mime type
     if not mime or not mime.startswith("image/"):
-        LOGGER.warning(f"Converting non-image MIME type '{mime}' to 'image/jpeg'")
+        LOGGER.warning("Converting non-image MIME type %r to 'image/jpeg'", mime)
         mime = "image/jpeg"  # Default to jpeg if not an image type
 
     b64 = base64.b64encode(resp.content).decode()
@@ -49,8 +50,8 @@ class WhatsAppAgent(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    async def process_form(self, form: dict) -> str | dict:
-        """Process a parsed Twilio form payload and return text reply"""
+    async def process_form(self, form: dict) -> dict:
+        """Process a parsed Twilio form payload and return the structured reply"""
         raise NotImplementedError
 
 
@@ -58,18 +59,20 @@ class WhatsAppAgentTwilio(WhatsAppAgent):
     def __init__(self) -> None:
         if not (TWILIO_AUTH_TOKEN and TWILIO_ACCOUNT_SID):
             raise ValueError("Twilio credentials are not configured")
-        self.agent = Agent()
+        self.agent = create_agent()
         self.twilio_client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
 
     async def handle_message(self, request: Request) -> str:
         form = await request.form()
-        message_text = await self.process_form(form)
+        reply = await self.process_form(form)
 
         twiml = MessagingResponse()
-        twiml.message(message_text)
+        message = twiml.message(reply["text"])
+        if reply.get("media_url"):
+            message.media(reply["media_url"])
         return str(twiml)
 
-    async def process_form(self, form: dict) -> str | dict:
+    async def process_form(self, form: dict) -> dict:
         sender = form.get("From", "").strip()
         content = form.get("Body", "").strip()
         if not sender:
@@ -102,64 +105,38 @@ class WhatsAppAgentTwilio(WhatsAppAgent):
         reply = await self.agent.invoke(**input_data)
         return self._format_reply(reply)
 
-    def _format_reply(self, reply):
-        """Normalize assistant responses for WhatsApp delivery.
+    def _format_reply(self, reply: dict) -> dict:
+        """Normalize the agent's structured reply for WhatsApp delivery.
 
-        If the assistant returns a dictionary with a ``button`` field, keep the
-        structure intact so ``send_whatsapp_message`` can generate a WhatsApp
-        button using Twilio's ``persistent_action`` parameter. When the
-        assistant returns a JSON string, attempt to parse it so the button can
-        be extracted correctly. Otherwise convert the reply to a plain string.
+        ``Agent.invoke`` returns the supervisor's typed reply as a dictionary
+        with ``text``, an optional ``button`` (``text`` and ``url``) and an
+        optional ``media_url``. Fields are read directly; empty ones are
+        dropped so ``send_whatsapp_message`` only sees what should be sent.
         """
 
-        LOGGER.info(f"Formatting reply - Type: {type(reply)}, Content: {reply}")
+        LOGGER.debug("Formatting reply", extra={"reply": reply})
 
-        if isinstance(reply, dict) and "text" in reply and "button" in reply:
-            LOGGER.info("Reply already formatted with button")
-            return reply
-
-        if isinstance(reply, str):
-            # Check if the string contains a JSON object with button
-            # First try to find JSON in the string
-            if '{\n    "text":' in reply and '"button":' in reply:
-                try:
-                    # Extract JSON from the string
-                    json_start = reply.find('{\n    "text":')
-                    json_str = reply[json_start:]
-                    parsed = json.loads(json_str)
-                    if isinstance(parsed, dict) and "text" in parsed and "button" in parsed:
-                        LOGGER.info("Extracted and parsed JSON reply successfully as button message")
-                        return parsed
-                except json.JSONDecodeError as e:
-                    LOGGER.error(f"Failed to parse extracted JSON: {e}")
-            
-            # Try parsing the whole string as JSON
-            try:
-                parsed = json.loads(reply)
-                if isinstance(parsed, dict) and "text" in parsed and "button" in parsed:
-                    LOGGER.info("Parsed entire reply as JSON button message")
-                    return parsed
-            except json.JSONDecodeError:
-                LOGGER.debug("Reply is not JSON, treating as plain text")
-                pass
-
-        LOGGER.info("Returning plain string reply")
-        return str(reply)
+        button = reply.get("button")
+        return {
+            "text": reply.get("text") or "",
+            "button": button if isinstance(button, dict) and button.get("url") else None,
+            "media_url": reply.get("media_url") or None,
+        }
 
     def send_whatsapp_message(self, to: str, body: str | dict) -> None:
         """Send a WhatsApp message via Twilio.
 
-        ``body`` may be a plain string or a dictionary containing ``text`` and a
-        ``button`` with a ``url``. In the latter case we use Twilio's
-        ``persistent_action`` field so the link appears as a tappable button in
-        WhatsApp. Set ``include_url`` inside the ``button`` dictionary to
-        ``True`` if the raw URL should also be appended to the message text.
+        ``body`` may be a plain string or a structured reply dictionary with
+        ``text``, an optional ``button`` and an optional ``media_url``. A
+        ``button`` with a ``url`` is sent through a pre-approved template so the
+        link appears as a tappable button in WhatsApp; ``media_url`` is
+        attached to regular messages.
         """
 
         if not TWILIO_PHONE_NUMBER:
             raise RuntimeError("TWILIO_PHONE_NUMBER not configured")
 
-        LOGGER.info(f"send_whatsapp_message called - to: {to}, body type: {type(body)}, body: {body}")
+        LOGGER.debug("send_whatsapp_message called", extra={"to": to, "body_type": type(body).__name__, "body": body})
 
         params = {
             "from_": f"whatsapp:{TWILIO_PHONE_NUMBER}",
@@ -168,23 +145,25 @@ class WhatsAppAgentTwilio(WhatsAppAgent):
 
         if isinstance(body, dict):
             text = body.get("text", "")
-            button = body.get("button", {})
-            LOGGER.info(f"Dict body - text: {text}, button: {button}")
+            button = body.get("button") or {}
+            LOGGER.debug("Dict body", extra={"text": text, "button": button})
             if isinstance(button, dict) and button.get("url"):
-                LOGGER.info(f"Sending template message for auth button")
+                LOGGER.info("Sending template message for auth button", extra={"to": to})
                 # Use template message for auth buttons
                 self._send_template_message(
                     to=to,
                     text=text,
                     url=button["url"],
-                    template_sid="HXc2abe9968746afb615cd602f8d85b6a5",
+                    template_sid=AUTH_TEMPLATE_SID,
                 )
                 return
             params["body"] = text
+            if body.get("media_url"):
+                params["media_url"] = [body["media_url"]]
         else:
             params["body"] = body
 
-        LOGGER.info("Sending regular WhatsApp message with params: %s", params)
+        LOGGER.info("Sending regular WhatsApp message", extra={"to": to, "body_chars": len(params["body"] or "")})
         self.twilio_client.messages.create(**params)
 
     def _send_template_message(self, to: str, text: str, url: str, template_sid: str) -> None:
@@ -194,29 +173,13 @@ class WhatsAppAgentTwilio(WhatsAppAgent):
         if url.startswith("https://"):
             url = url[8:]
         
-        LOGGER.info(f"Sending template message with SID: {template_sid}")
-        LOGGER.info(f"Template variables - reply_text: {text}, auth_link: {url}")
+        LOGGER.debug("Template variables", extra={"template_sid": template_sid, "reply_text": text, "auth_link": url})
         
         try:
-            # Create the content variables for the template
             # Using the exact variable names from your template
-            content_variables = {
-                "auth_text": text,
-                "auth_link": url,
-            }
-            
-            params = {
-                "from_": f"whatsapp:{TWILIO_PHONE_NUMBER}",
-                "to": to,
-                "content_sid": template_sid,
-                "content_variables": json.dumps(content_variables),
-            }
-            
-            LOGGER.info("Sending WhatsApp template message with params: %s", params)
-            message = self.twilio_client.messages.create(**params)
-            LOGGER.info(f"Template message sent successfully: {message.sid}")
+            self.send_template(to, template_sid, {"auth_text": text, "auth_link": url})
         except Exception as e:
-            LOGGER.error(f"Failed to send template message: {str(e)}")
+            LOGGER.error("Failed to send template message: %s", e)
             # Fall back to regular text message
             LOGGER.info("Falling back to regular text message")
             self.twilio_client.messages.create(
@@ -225,3 +188,20 @@ class WhatsAppAgentTwilio(WhatsAppAgent):
                 body=f"{text}\n\nAuthorization link: {url}"
             )
 
+    def send_template(self, to: str, template_sid: str, variables: dict) -> None:
+        """Send a pre-approved content template.
+
+        Templates are the only messages WhatsApp delivers outside the 24-hour
+        session window, so errors are raised rather than answered with a
+        free-form fallback.
+        """
+        if not TWILIO_PHONE_NUMBER:
+            raise RuntimeError("TWILIO_PHONE_NUMBER not configured")
+
+        message = self.twilio_client.messages.create(
+            from_=f"whatsapp:{TWILIO_PHONE_NUMBER}",
+            to=to,
+            content_sid=template_sid,
+            content_variables=json.dumps(variables),
+        )
+        LOGGER.info("Template message sent", extra={"to": to, "template_sid": template_sid, "message_sid": message.sid})
@@ -4,9 +4,22 @@ import logging
 LOGGER = logging.getLogger(__name__)
 
 LANGGRAPH_URL = environ.get("LANGGRAPH_URL")
+# "remote" calls the LangGraph server at LANGGRAPH_URL, "local" runs the graph in-process
+LANGGRAPH_MODE = environ.get("LANGGRAPH_MODE") or "remote"
+CHECKPOINT_DB = environ.get("CHECKPOINT_DB") or "checkpoints.sqlite3"
 ASSISTANT_ID = environ.get("LANGGRAPH_ASSISTANT_ID", "agent")
 CONFIG = environ.get("CONFIG") or "{}"
 TWILIO_AUTH_TOKEN = environ.get("TWILIO_AUTH_TOKEN")
 TWILIO_ACCOUNT_SID = environ.get("TWILIO_ACCOUNT_SID")
 TWILIO_PHONE_NUMBER = environ.get("TWILIO_PHONE_NUMBER")
 ARCADE_USER_ID = environ.get("ARCADE_USER_ID")
+# Approved WhatsApp content templates. The auth template takes {{auth_text}}
+# and {{auth_link}}, the reminder template the appointment date {{1}} and time {{2}}.
+AUTH_TEMPLATE_SID = environ.get("AUTH_TEMPLATE_SID") or "HXc2abe9968746afb615cd602f8d85b6a5"
+REMINDER_TEMPLATE_SID = environ.get("REMINDER_TEMPLATE_SID")
+REMINDER_RATE_PER_SECOND = float(environ.get("REMINDER_RATE_PER_SECOND") or "10")
+LOG_LEVEL = environ.get("LOG_LEVEL") or "INFO"
+# Fraction of DEBUG/INFO records kept; warnings and errors are always logged
+LOG_SAMPLE_RATE = float(environ.get("LOG_SAMPLE_RATE") or "1.0")
+LOG_MAX_FIELD_CHARS = int(environ.get("LOG_MAX_FIELD_CHARS") or "200")
+LOG_QUEUE_SIZE = int(environ.get("LOG_QUEUE_SIZE") or "10000")
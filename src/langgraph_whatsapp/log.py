@@ -0,0 +1,179 @@
+# log.py
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from langgraph_whatsapp import config
+
+# Loggers used on the webhook hot path; they are routed through the queue
+APP_LOGGERS = ("whatsapp", "server", "reminders", "langgraph_whatsapp", "src.langgraph_whatsapp", "agents")
+
+CORRELATION_ID = contextvars.ContextVar("correlation_id", default="-")
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_LISTENER: Optional[QueueListener] = None
+_HANDLER: Optional[logging.Handler] = None
+
+
+def new_correlation_id(value: Optional[str] = None) -> str:
+    """Set the correlation id for the current message (e.g. Twilio's MessageSid)."""
+    correlation_id = value or uuid.uuid4().hex[:12]
+    CORRELATION_ID.set(correlation_id)
+    return correlation_id
+
+
+class _ContextFilter(logging.Filter):
+    """Stamps the correlation id and drops sampled-out records.
+
+    Runs in the caller's thread, before the record is queued, so it must stay
+    cheap: one context variable lookup and at most one random draw.
+    """
+
+    def __init__(self, sample_rate: float):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.WARNING and self.sample_rate < 1.0:
+            if random.random() >= self.sample_rate:
+                return False
+        record.correlation_id = CORRELATION_ID.get()
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Queue handler that never formats or blocks in the caller's thread.
+
+    Records that do not fit in the queue are dropped and counted. Once the
+    queue has room again, a warning with the number of dropped records is
+    queued, at most once per ``report_interval`` seconds.
+    """
+
+    dropped = 0
+    report_interval = 60.0
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self._reported = 0
+        self._last_report = 0.0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The default implementation formats the message here; defer that to
+        # the listener thread instead.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Under load, drop the record rather than stall the event loop
+            _NonBlockingQueueHandler.dropped += 1
+            return
+        if self.dropped > self._reported and time.monotonic() - self._last_report >= self.report_interval:
+            self._report_dropped()
+
+    def _report_dropped(self) -> None:
+        # Called from emit, under the handler lock
+        count = self.dropped - self._reported
+        warning = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            "Dropped %d log records because the log queue was full", (count,), None,
+        )
+        warning.correlation_id = "-"
+        try:
+            self.queue.put_nowait(warning)
+        except queue.Full:
+            return
+        self._reported += count
+        self._last_report = time.monotonic()
+
+
+def dropped_records() -> int:
+    """Number of log records dropped on a full queue since startup."""
+    return _NonBlockingQueueHandler.dropped
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with ``extra`` fields kept as structured keys.
+
+    String values longer than ``max_field_chars`` are truncated so full
+    payloads (reply bodies, Twilio params) never reach the log sink.
+    """
+
+    def __init__(self, max_field_chars: int = 200):
+        super().__init__()
+        self.max_field_chars = max_field_chars
+
+    def _truncate(self, value):
+        if not isinstance(value, (str, int, float, bool, type(None))):
+            value = str(value)
+        if isinstance(value, str) and len(value) > self.max_field_chars:
+            return f"{value[:self.max_field_chars]}…(+{len(value) - self.max_field_chars} chars)"
+        return value
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": self._truncate(record.getMessage()),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = self._truncate(value)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logging() -> None:
+    """Route the app loggers through a bounded queue drained by a background thread."""
+    global _LISTENER, _HANDLER
+    if _LISTENER is not None:
+        return
+
+    log_queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+    sink = logging.StreamHandler(sys.stderr)
+    sink.setFormatter(JsonFormatter(config.LOG_MAX_FIELD_CHARS))
+
+    _HANDLER = _NonBlockingQueueHandler(log_queue)
+    _HANDLER.addFilter(_ContextFilter(config.LOG_SAMPLE_RATE))
+
+    for name in APP_LOGGERS:
+        logger = logging.getLogger(name)
+        logger.setLevel(config.LOG_LEVEL)
+        logger.addHandler(_HANDLER)
+        logger.propagate = False
+
+    _LISTENER = QueueListener(log_queue, sink, respect_handler_level=True)
+    _LISTENER.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records, stop the background thread and restore the app loggers.
+
+    Later records propagate to the root logger again instead of going to a
+    queue nobody drains.
+    """
+    global _LISTENER, _HANDLER
+    if _HANDLER is not None:
+        for name in APP_LOGGERS:
+            logger = logging.getLogger(name)
+            logger.removeHandler(_HANDLER)
+            logger.propagate = True
+        _HANDLER = None
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER = None
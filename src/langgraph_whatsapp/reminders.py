@@ -0,0 +1,188 @@
+# reminders.py
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from typing import Callable, List, Optional
+
+from agents.base.reminders import EXPIRED, FAILED, PENDING, SENT, ReminderStore
+from langgraph_whatsapp import config
+
+LOGGER = logging.getLogger("reminders")
+
+
+class _RateLimiter:
+    """Token bucket limiting outbound sends to ``rate`` per second."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ReminderScheduler:
+    """Dispatches due reminders from a ``ReminderStore``.
+
+    Reminders due within ``horizon`` seconds are kept in a heap keyed by
+    ``remind_at``; the store is re-polled every ``poll_interval`` seconds to
+    pick up reminders added by other processes. Due reminders are popped in
+    batches, claimed in the store so no other worker or replica sends them
+    too, sent concurrently through a rate-limited pipeline, and their new
+    status is written back in a single transaction. After a restart, every
+    overdue reminder is picked up by the first poll; reminders whose
+    appointment has already started are marked expired instead of sent.
+
+    The graph enqueues reminders in its own process. In remote mode that is
+    the LangGraph server, so the store must be a database both processes
+    share: the scheduler only starts when ``REMINDERS_DB`` is an absolute path.
+
+    Reminders usually fall outside WhatsApp's 24-hour session window, where
+    free-form messages are rejected, so they are sent through the approved
+    content template ``template_sid`` with
+    ``sender(to_number, template_sid, variables)``. Without a template the
+    scheduler does not start and reminders stay queued.
+    """
+
+    MAX_ATTEMPTS = 3
+
+    def __init__(
+        self,
+        sender: Callable[[str, str, dict], None],
+        template_sid: Optional[str] = None,
+        store: Optional[ReminderStore] = None,
+        rate_per_second: Optional[float] = None,
+        batch_size: int = 50,
+        max_concurrency: int = 10,
+        poll_interval: float = 30.0,
+        horizon: float = 3600.0,
+    ):
+        self.sender = sender
+        self.template_sid = template_sid or config.REMINDER_TEMPLATE_SID
+        self.store = store or ReminderStore()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.horizon = horizon
+        self._limiter = _RateLimiter(rate_per_second or config.REMINDER_RATE_PER_SECOND)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._heap: List[tuple] = []
+        self._queued = set()
+        self._last_poll = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if not self.template_sid:
+            LOGGER.warning("REMINDER_TEMPLATE_SID is not set; appointment reminders will not be sent")
+            return
+        if config.LANGGRAPH_MODE == "remote" and not os.path.isabs(self.store.path):
+            LOGGER.error(
+                "REMINDERS_DB must be an absolute path shared with the LangGraph server "
+                "(got %r); appointment reminders will not be sent",
+                self.store.path,
+            )
+            return
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _poll(self, now: float) -> None:
+        pending = await asyncio.to_thread(self.store.pending_until, now + self.horizon)
+        for reminder_id, remind_at in pending:
+            if reminder_id not in self._queued:
+                self._queued.add(reminder_id)
+                heapq.heappush(self._heap, (remind_at, reminder_id))
+        self._last_poll = now
+
+    def _pop_due(self, now: float) -> List[int]:
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            _, reminder_id = heapq.heappop(self._heap)
+            self._queued.discard(reminder_id)
+            due.append(reminder_id)
+        return due
+
+    async def _send(self, to_number: str, variables: str) -> bool:
+        async with self._semaphore:
+            await self._limiter.acquire()
+            try:
+                await asyncio.to_thread(self.sender, to_number, self.template_sid, json.loads(variables))
+                return True
+            except Exception as e:
+                LOGGER.error("Failed to send reminder to %s: %s", to_number, e)
+                return False
+
+    async def dispatch_due(self, now: Optional[float] = None) -> int:
+        """Send one batch of due reminders. Returns the number taken off the queue."""
+        now = time.time() if now is None else now
+        if now - self._last_poll >= self.poll_interval:
+            await self._poll(now)
+
+        due = self._pop_due(now)
+        if not due:
+            return 0
+        # The store calls block on SQLite, so they run off the event loop
+        rows = await asyncio.to_thread(self.store.claim, due, now)
+        if not rows:
+            # Another worker got there first
+            return len(due)
+
+        expired = [row for row in rows if row["starts_at"] <= now]
+        live = [row for row in rows if row["starts_at"] > now]
+        results = await asyncio.gather(*(self._send(row["to_number"], row["variables"]) for row in live))
+
+        updates = [(EXPIRED, row["attempts"], row["remind_at"], row["id"]) for row in expired]
+        for row, ok in zip(live, results):
+            attempts = row["attempts"] + 1
+            if ok:
+                updates.append((SENT, attempts, row["remind_at"], row["id"]))
+            elif attempts >= self.MAX_ATTEMPTS:
+                updates.append((FAILED, attempts, row["remind_at"], row["id"]))
+            else:
+                retry_at = now + 60 * attempts
+                updates.append((PENDING, attempts, retry_at, row["id"]))
+                self._queued.add(row["id"])
+                heapq.heappush(self._heap, (retry_at, row["id"]))
+        await asyncio.to_thread(self.store.mark, updates)
+
+        LOGGER.info(
+            "Reminder batch done: %d sent, %d expired, %d failed",
+            sum(results), len(expired), len(live) - sum(results),
+        )
+        return len(due)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Drain everything that is due (e.g. the backlog after downtime)
+                while await self.dispatch_due():
+                    pass
+            except Exception:
+                LOGGER.exception("Reminder dispatch failed")
+
+            now = time.time()
+            wake_at = self._last_poll + self.poll_interval
+            if self._heap:
+                wake_at = min(wake_at, self._heap[0][0])
+            await asyncio.sleep(max(0.0, wake_at - now))
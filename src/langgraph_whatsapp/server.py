@@ -1,5 +1,6 @@
 # server.py
 import logging
+from contextlib import asynccontextmanager
 from urllib.parse import parse_qs
 
 from fastapi import BackgroundTasks, FastAPI, Request, Response, HTTPException
@@ -7,13 +8,33 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import Message
 from twilio.request_validator import RequestValidator
 
+from agents.base.models import LATENCY
 from src.langgraph_whatsapp.channel import WhatsAppAgentTwilio
+from src.langgraph_whatsapp.reminders import ReminderScheduler
 from twilio.twiml.messaging_response import MessagingResponse
 from src.langgraph_whatsapp.config import TWILIO_AUTH_TOKEN
+from src.langgraph_whatsapp.log import dropped_records, new_correlation_id, setup_logging, shutdown_logging
 
+setup_logging()
 LOGGER = logging.getLogger("server")
-APP = FastAPI()
 WSP_AGENT = WhatsAppAgentTwilio()
+REMINDERS = ReminderScheduler(sender=WSP_AGENT.send_template)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Reminders queued while the server was down are sent on the first poll
+    REMINDERS.start()
+    try:
+        yield
+    finally:
+        await REMINDERS.stop()
+        if hasattr(WSP_AGENT.agent, "aclose"):
+            await WSP_AGENT.agent.aclose()
+        shutdown_logging()
+
+
+APP = FastAPI(lifespan=lifespan)
 
 
 class TwilioMiddleware(BaseHTTPMiddleware):
@@ -57,16 +78,18 @@ APP.add_middleware(TwilioMiddleware, path="/whatsapp")
 async def whatsapp_reply_twilio(request: Request, background_tasks: BackgroundTasks):
     try:
         form = await request.form()
+        # Every log line for this message carries Twilio's MessageSid
+        correlation_id = new_correlation_id(form.get("MessageSid"))
 
         async def _process():
+            new_correlation_id(correlation_id)
             try:
                 LOGGER.info("Starting background run")
                 message = await WSP_AGENT.process_form(form)
-                LOGGER.info(f"Background run succeeded")
+                LOGGER.info("Background run succeeded")
                 WSP_AGENT.send_whatsapp_message(form.get("From", "").strip(), message)
             except Exception as e:
-                LOGGER.error(f"Exception in background task: {str(e)}")
-                LOGGER.exception("Full traceback:")
+                LOGGER.exception("Exception in background task: %s", e)
                 raise
 
         background_tasks.add_task(_process)
@@ -82,6 +105,23 @@ async def whatsapp_reply_twilio(request: Request, background_tasks: BackgroundTa
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@APP.get("/metrics/llm")
+async def llm_metrics():
+    """LLM latency histograms, percentiles and error counts per role and model.
+
+    The models run wherever the graph does: with ``LANGGRAPH_MODE=remote``
+    that is the LangGraph server, so this process has no samples and the
+    report is empty. Use ``LANGGRAPH_MODE=local`` to collect them here.
+    """
+    return LATENCY.report()
+
+
+@APP.get("/metrics/logging")
+async def logging_metrics():
+    """Log records dropped because the log queue was full."""
+    return {"dropped_records": dropped_records()}
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import sys
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from langchain_core.tools import tool
+
+from agents.base.availability import AvailabilitySnapshot, business_days, parse_busy_intervals
+
+
+@tool
+def Google_ListEvents(min_end_datetime: str, max_start_datetime: str, max_results: int = 10) -> dict:
+    """Fake calendar with one booking on Monday."""
+    return {"events": [{"start": {"dateTime": "2030-05-20T16:00:00"}, "end": {"dateTime": "2030-05-20T17:00:00"}}]}
+
+
+def test_business_days_skip_weekends():
+    assert business_days(date(2030, 5, 24), 2) == [date(2030, 5, 24), date(2030, 5, 27)]
+
+
+def test_snapshot_renders_free_ranges_and_bookings():
+    snapshot = AvailabilitySnapshot(days=2, refresh_interval=86400)
+    snapshot._list_events = Google_ListEvents
+    now = datetime(2030, 5, 20, 9, 0)
+    asyncio.run(snapshot.refresh(now=now))
+
+    assert snapshot.render(now).splitlines() == [
+        "- Mon 2030-05-20: 15:00-15:30, 17:00-20:30",
+        "- Tue 2030-05-21: 15:00-20:30",
+    ]
+
+    snapshot.record_booking({"event": {"start": {"dateTime": "2030-05-21T15:00:00"}, "end": {"dateTime": "2030-05-21T15:30:00"}}})
+
+    assert snapshot.render(now).splitlines()[1] == "- Tue 2030-05-21: 15:30-20:30"
+    assert snapshot.render(datetime(2030, 5, 20, 20, 0)).splitlines()[0] == "- Mon 2030-05-20: 20:00-20:30"
+
+
+def test_event_times_are_read_in_the_shop_timezone(monkeypatch):
+    monkeypatch.setenv("SHOP_TIMEZONE", "America/Argentina/Buenos_Aires")
+    events = {"events": [{"start": {"dateTime": "2030-05-20T19:00:00Z"}, "end": {"dateTime": "2030-05-20T20:00:00Z"}}]}
+
+    assert parse_busy_intervals(events) == [(datetime(2030, 5, 20, 16, 0), datetime(2030, 5, 20, 17, 0))]
+
+
+def test_booking_over_an_event_the_snapshot_missed_is_reported():
+    from langchain_core.runnables import RunnableConfig
+
+    from agents.base.tools import with_conflict_check
+
+    @tool
+    def Google_CreateEvent(start: str, end: str, config: RunnableConfig) -> dict:
+        """Fake calendar that accepts any booking."""
+        return {"event": {"id": "new", "start": {"dateTime": start}, "end": {"dateTime": end}}}
+
+    @tool
+    def Google_ListEvents(min_end_datetime: str, max_start_datetime: str, max_results: int = 10) -> dict:
+        """Fake calendar with a walk-in booked after the last snapshot refresh."""
+        return {"events": [
+            {"id": "new", "start": {"dateTime": "2030-05-20T15:00:00"}, "end": {"dateTime": "2030-05-20T15:30:00"}},
+            {"id": "walk-in", "summary": "Walk-in", "start": {"dateTime": "2030-05-20T15:00:00"}, "end": {"dateTime": "2030-05-20T15:30:00"}},
+        ]}
+
+    create_event = with_conflict_check(Google_CreateEvent, Google_ListEvents)
+
+    taken = asyncio.run(create_event.ainvoke({"start": "2030-05-20T15:00:00", "end": "2030-05-20T15:30:00"}))
+    free = create_event.invoke({"start": "2030-05-20T16:00:00", "end": "2030-05-20T16:30:00"})
+
+    assert taken["conflicts"] == [{"summary": "Walk-in", "start": "2030-05-20T15:00:00", "end": "2030-05-20T15:30:00"}]
+    assert "conflicts" not in free
@@ -0,0 +1,74 @@
+import asyncio
+import os
+import sys
+import uuid
+from contextlib import asynccontextmanager
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "dummy")
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "dummy")
+os.environ.setdefault("TWILIO_PHONE_NUMBER", "dummy")
+
+# The channel tests stub langgraph_sdk; the agent module needs the real package
+if not hasattr(sys.modules.get("langgraph_sdk"), "__path__"):
+    sys.modules.pop("langgraph_sdk", None)
+
+from langchain_core.messages import AIMessage
+from langgraph.graph import MessagesState, StateGraph
+
+import agents.base.graph
+from langgraph_whatsapp.agent import InProcessAgent
+from langgraph_whatsapp.log import new_correlation_id
+
+
+def _stub_build_agent(calls, running):
+    async def answer(state, config):
+        running.append(1)
+        calls.append({
+            **config["configurable"],
+            "correlation_id": config["metadata"]["correlation_id"],
+            "active": len(running),
+            "seen": len(state["messages"]),
+        })
+        await asyncio.sleep(0.05)
+        running.pop()
+        return {"messages": [AIMessage(f"reply {len(state['messages'])}")]}
+
+    @asynccontextmanager
+    async def build_agent():
+        builder = StateGraph(MessagesState)
+        builder.add_node("answer", answer)
+        builder.set_entry_point("answer")
+        yield builder
+
+    return build_agent
+
+
+def test_runs_share_a_checkpointed_thread_and_are_serialized(tmp_path, monkeypatch):
+    calls, running = [], []
+    monkeypatch.setattr(agents.base.graph, "build_agent", _stub_build_agent(calls, running))
+    agent = InProcessAgent(checkpoint_db=str(tmp_path / "checkpoints.sqlite3"))
+
+    async def run():
+        try:
+            new_correlation_id("SM123")
+            first = await agent.invoke("whatsapp:+1", "hi")
+            await asyncio.gather(
+                agent.invoke("whatsapp:+1", "one"),
+                agent.invoke("whatsapp:+1", "two"),
+            )
+            return first
+        finally:
+            await agent.aclose()
+
+    first = asyncio.run(run())
+
+    assert first == {"text": "reply 1", "button": None, "media_url": None}
+    assert {call["thread_id"] for call in calls} == {str(uuid.uuid5(uuid.NAMESPACE_DNS, "whatsapp:+1"))}
+    assert {call["user_id"] for call in calls} == {"whatsapp:+1"}
+    assert {call["correlation_id"] for call in calls} == {"SM123"}
+    # Each run sees the previous turns from the checkpoint, one run at a time
+    assert [call["seen"] for call in calls] == [1, 3, 5]
+    assert max(call["active"] for call in calls) == 1
+    assert agent._thread_locks == {}
@@ -0,0 +1,72 @@
+import json
+import logging
+import os
+import queue
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from langgraph_whatsapp.log import (
+    APP_LOGGERS,
+    JsonFormatter,
+    _ContextFilter,
+    _NonBlockingQueueHandler,
+    dropped_records,
+    new_correlation_id,
+    setup_logging,
+    shutdown_logging,
+)
+
+
+def _record(msg, *args, **extra):
+    record = logging.LogRecord("whatsapp", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_formatter_keeps_fields_structured_and_truncated():
+    new_correlation_id("SM123")
+    record = _record("Sending to %s", "whatsapp:+1", body="x" * 50)
+    _ContextFilter(sample_rate=1.0).filter(record)
+
+    entry = json.loads(JsonFormatter(max_field_chars=10).format(record))
+
+    assert entry["msg"] == "Sending to…(+12 chars)"
+    assert entry["body"] == "xxxxxxxxxx…(+40 chars)"
+    assert entry["correlation_id"] == "SM123"
+
+
+def test_sampling_never_drops_warnings():
+    record = _record("careful")
+    record.levelno = logging.WARNING
+
+    assert _ContextFilter(sample_rate=0.0).filter(record)
+    assert not _ContextFilter(sample_rate=0.0).filter(_record("chatty"))
+
+
+def test_dropped_records_are_reported_once_there_is_room():
+    log_queue = queue.Queue(maxsize=2)
+    handler = _NonBlockingQueueHandler(log_queue)
+    handler.report_interval = 0
+    for i in range(3):
+        handler.emit(_record(f"message {i}"))
+    while not log_queue.empty():
+        log_queue.get_nowait()
+
+    handler.emit(_record("message 3"))
+
+    assert [r.getMessage() for r in (log_queue.get_nowait(), log_queue.get_nowait())] == [
+        "message 3",
+        "Dropped 1 log records because the log queue was full",
+    ]
+    assert dropped_records() >= 1
+
+
+def test_shutdown_hands_app_loggers_back_to_the_root_logger():
+    setup_logging()
+    shutdown_logging()
+
+    for name in APP_LOGGERS:
+        logger = logging.getLogger(name)
+        assert logger.propagate
+        assert not any(isinstance(h, _NonBlockingQueueHandler) for h in logger.handlers)
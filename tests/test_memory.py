@@ -0,0 +1,113 @@
+import gc
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from agents.base.memory import ClientMemoryIndex, ClientMemoryStore, HashingEmbedder, make_embedder
+
+
+def test_search_returns_best_match_first(tmp_path):
+    store = ClientMemoryStore(str(tmp_path))
+    store.add("whatsapp:+1", ["Prefers Friday evenings", "Usually gets a skin fade", "Allergic to hair wax"])
+
+    results = store.search("whatsapp:+1", "what haircut does he get, a fade?", k=2)
+
+    assert len(results) == 2
+    assert results[0][0] == "Usually gets a skin fade"
+    assert results[0][1] >= results[1][1]
+
+
+def test_memories_are_isolated_per_client(tmp_path):
+    store = ClientMemoryStore(str(tmp_path))
+    store.add("whatsapp:+1", ["Prefers Friday evenings"])
+
+    assert store.search("whatsapp:+2", "Friday") == []
+
+
+def test_index_persists_and_grows_across_reopen(tmp_path):
+    store = ClientMemoryStore(str(tmp_path), dim=64)
+    index = store.get("whatsapp:+1")
+    texts = [f"memory number {i}" for i in range(ClientMemoryIndex.INITIAL_CAPACITY + 10)]
+    index.add(texts[:100])
+    index.add(texts[100:])
+
+    reopened = ClientMemoryStore(str(tmp_path), dim=64).get("whatsapp:+1")
+
+    assert reopened.count == len(texts)
+    assert reopened.capacity > ClientMemoryIndex.INITIAL_CAPACITY
+    assert reopened.search("memory number 263", k=1)[0][0] == "memory number 263"
+
+
+def test_search_for_unknown_client_creates_nothing(tmp_path):
+    store = ClientMemoryStore(str(tmp_path))
+
+    assert store.search("whatsapp:+1", "Friday") == []
+    assert os.listdir(tmp_path) == []
+
+
+def test_idle_indexes_are_closed_and_reopen_on_use(tmp_path):
+    store = ClientMemoryStore(str(tmp_path), dim=64, max_open=2)
+    indexes = [store.get(client) for client in ("whatsapp:+1", "whatsapp:+2", "whatsapp:+3")]
+    for index in indexes:
+        index.add([f"memory of {index.path}"])
+
+    # Indexes reached through a held reference count toward the limit too
+    assert [index._vectors is not None for index in indexes] == [False, True, True]
+
+    assert indexes[0].search("memory", k=1)[0][0] == f"memory of {indexes[0].path}"
+    assert [index._vectors is not None for index in indexes] == [True, False, True]
+
+
+def test_idle_indexes_are_freed(tmp_path):
+    store = ClientMemoryStore(str(tmp_path), dim=64, max_open=1)
+    store.add("whatsapp:+1", ["Prefers Friday evenings"])
+    store.add("whatsapp:+2", ["Usually gets a skin fade"])
+    gc.collect()
+
+    assert list(store._indexes) == ["whatsapp:+2"]
+    assert store.search("whatsapp:+1", "Friday", k=1)[0][0] == "Prefers Friday evenings"
+
+
+def test_index_refuses_another_embedder(tmp_path):
+    ClientMemoryStore(str(tmp_path), dim=64).add("whatsapp:+1", ["Prefers Friday evenings"])
+
+    class OtherEmbedder(HashingEmbedder):
+        name = "other"
+
+    with pytest.raises(ValueError, match="MEMORY_EMBEDDER"):
+        ClientMemoryStore(str(tmp_path), embedder=OtherEmbedder(64)).search("whatsapp:+1", "Friday")
+
+
+def test_unknown_embedder_is_rejected():
+    with pytest.raises(ValueError, match="word2vec"):
+        make_embedder("word2vec")
+
+
+def test_sentence_embedder_matches_paraphrases(tmp_path):
+    pytest.importorskip("fastembed")
+    try:
+        embedder = make_embedder("fastembed")
+    except Exception as e:  # the model download needs network access
+        pytest.skip(f"fastembed model unavailable: {e}")
+    store = ClientMemoryStore(str(tmp_path), embedder=embedder)
+    store.add("whatsapp:+1", ["Prefers Friday evenings", "Usually gets a skin fade", "Allergic to hair wax"])
+
+    assert store.search("whatsapp:+1", "usual haircut style", k=1)[0][0] == "Usually gets a skin fade"
+    assert store.search("whatsapp:+1", "when does he like to come in", k=1)[0][0] == "Prefers Friday evenings"
+
+
+def test_memory_tools_need_a_client(tmp_path, monkeypatch):
+    from agents.base import memory
+    from agents.base.tools import add_memory, fetch_memories
+
+    monkeypatch.setattr(memory, "_STORE", ClientMemoryStore(str(tmp_path)))
+
+    result = add_memory.invoke({"memories": ["Prefers Friday evenings"]}, {"configurable": {"thread_id": "t1"}})
+
+    assert "error" in json.loads(result)
+    assert os.listdir(tmp_path) == []
+    assert "error" in json.loads(fetch_memories.invoke({"query": "Friday"}, {"configurable": {}}))
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from agents.base.models import HedgedChatModel, LATENCY, _make_chat_model
+
+
+def _model(delay, content, fail=False):
+    async def _call(_):
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("provider error")
+        return AIMessage(content)
+    return RunnableLambda(_call)
+
+
+def test_slow_primary_is_hedged_with_backup():
+    model = HedgedChatModel(
+        primary=_model(5, "primary"), backup=_model(0.01, "backup"),
+        primary_name="hedge-primary", backup_name="hedge-backup", hedge_after=0.05,
+    )
+
+    assert asyncio.run(model.ainvoke("hi")).content == "backup"
+    # The cancelled primary still counts, at the time it ran before losing
+    assert LATENCY.percentile("default/hedge-primary", 0.5, min_samples=1) >= 0.05
+
+
+def test_primary_error_falls_back_to_backup():
+    model = HedgedChatModel(
+        primary=_model(0, "primary", fail=True), backup=_model(0, "backup"),
+        primary_name="failing-primary", backup_name="fallback-backup", role="calendar",
+    )
+
+    assert asyncio.run(model.ainvoke("hi")).content == "backup"
+    assert LATENCY.report()["calendar/failing-primary"]["errors"] == 1
+
+
+def test_latency_budget_is_enforced():
+    model = HedgedChatModel(
+        primary=_model(5, "primary"), primary_name="budget-primary",
+        hedge_after=0.05, latency_budget=0.1,
+    )
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(model.ainvoke("hi"))
+
+
+class _RunTree(BaseCallbackHandler):
+    def __init__(self):
+        self.model_runs, self.child_parents = [], []
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self.model_runs.append(run_id)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self.child_parents.append(parent_run_id)
+
+
+def test_inner_calls_get_callbacks_stop_and_kwargs():
+    seen = {}
+
+    def _call(messages, stop=None, temperature=None):
+        seen.update(stop=stop, temperature=temperature)
+        return AIMessage("primary")
+
+    tree = _RunTree()
+    model = HedgedChatModel(primary=RunnableLambda(_call), primary_name="traced-primary")
+
+    model.invoke("hi", {"callbacks": [tree]}, stop=["END"], temperature=0.2)
+
+    assert seen == {"stop": ["END"], "temperature": 0.2}
+    assert tree.child_parents == tree.model_runs
+
+
+def test_unknown_provider_is_rejected():
+    with pytest.raises(ValueError, match="anthropc"):
+        _make_chat_model("anthropc:some-model", timeout=5)
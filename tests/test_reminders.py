@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from agents.base.reminders import ReminderStore, schedule_from_event
+from langgraph_whatsapp.reminders import ReminderScheduler
+
+
+def _event(event_id, start):
+    return {"event": {"id": event_id, "start": {"dateTime": start}}}
+
+
+def test_schedule_from_event_is_idempotent(tmp_path):
+    store = ReminderStore(str(tmp_path / "reminders.sqlite3"))
+
+    assert schedule_from_event(store, "whatsapp:+1", _event("evt1", "2030-05-20T15:00:00"))
+    (row,) = store.get_many([1])
+    assert json.loads(row["variables"]) == {"1": "Monday May 20", "2": "15:00"}
+    assert not schedule_from_event(store, "whatsapp:+1", _event("evt1", "2030-05-20T15:00:00+00:00"))
+    assert not schedule_from_event(store, "whatsapp:+1", "not an event")
+
+
+def test_dispatch_catches_up_and_expires_past_appointments(tmp_path):
+    store = ReminderStore(str(tmp_path / "reminders.sqlite3"))
+    now = 1_000_000.0
+    store.add("due", "whatsapp:+1", now + 600, now - 60, {"1": "due"})
+    store.add("past", "whatsapp:+2", now - 60, now - 7200, {"1": "past"})
+    store.add("later", "whatsapp:+3", now + 7200, now + 3600, {"1": "later"})
+
+    sent = []
+    scheduler = ReminderScheduler(
+        sender=lambda to, template_sid, variables: sent.append((to, template_sid, variables)),
+        template_sid="HXreminder",
+        store=store,
+        rate_per_second=1000,
+    )
+
+    processed = asyncio.run(scheduler.dispatch_due(now=now))
+
+    assert processed == 2
+    assert sent == [("whatsapp:+1", "HXreminder", {"1": "due"})]
+    assert [row[0] for row in store.pending_until(now + 3600)] == [3]
+
+
+def test_failed_send_is_retried(tmp_path):
+    store = ReminderStore(str(tmp_path / "reminders.sqlite3"))
+    now = 1_000_000.0
+    store.add("evt", "whatsapp:+1", now + 600, now - 1, {"1": "Monday May 20"})
+
+    def failing_sender(to, template_sid, variables):
+        raise RuntimeError("twilio down")
+
+    scheduler = ReminderScheduler(
+        sender=failing_sender, template_sid="HXreminder", store=store, rate_per_second=1000
+    )
+    asyncio.run(scheduler.dispatch_due(now=now))
+
+    (reminder_id, remind_at), = store.pending_until(now + 3600)
+    assert remind_at == now + 60
+
+
+def test_each_reminder_is_sent_by_one_worker(tmp_path):
+    store = ReminderStore(str(tmp_path / "reminders.sqlite3"))
+    now = 1_000_000.0
+    store.add("evt", "whatsapp:+1", now + 600, now - 1, {"1": "Monday May 20"})
+
+    sent = []
+    workers = [
+        ReminderScheduler(
+            sender=lambda to, template_sid, variables: sent.append(to),
+            template_sid="HXreminder",
+            store=ReminderStore(store.path),
+            rate_per_second=1000,
+        )
+        for _ in range(2)
+    ]
+    for worker in workers:
+        asyncio.run(worker._poll(now))
+    for worker in workers:
+        asyncio.run(worker.dispatch_due(now=now))
+
+    assert sent == ["whatsapp:+1"]
+
+
+def test_claim_left_by_a_dead_worker_runs_out(tmp_path):
+    store = ReminderStore(str(tmp_path / "reminders.sqlite3"))
+    now = 1_000_000.0
+    store.add("evt", "whatsapp:+1", now + 3600, now - 1, {"1": "Monday May 20"})
+
+    assert len(store.claim([1], now, lease=300)) == 1
+    assert store.claim([1], now + 60) == []
+    assert len(store.claim([1], now + 300)) == 1
+
+
+def test_remote_mode_needs_a_shared_database(tmp_path, monkeypatch):
+    from langgraph_whatsapp import config
+
+    monkeypatch.setattr(config, "LANGGRAPH_MODE", "remote")
+    monkeypatch.chdir(tmp_path)
+    scheduler = ReminderScheduler(
+        sender=lambda *args: None, template_sid="HXreminder", store=ReminderStore("reminders.sqlite3")
+    )
+
+    async def start():
+        scheduler.start()
+        started = scheduler._task is not None
+        await scheduler.stop()
+        return started
+
+    assert not asyncio.run(start())
+
+
+def test_booking_runs_as_the_shop_and_reminds_the_client(tmp_path, monkeypatch):
+    from langchain_core.runnables import RunnableConfig
+    from langchain_core.tools import tool
+
+    from agents.base.tools import run_as, with_appointment_reminders
+
+    monkeypatch.setenv("REMINDERS_DB", str(tmp_path / "reminders.sqlite3"))
+    calendar_users = []
+
+    @tool
+    def create_event(event_id: str, config: RunnableConfig) -> dict:
+        """Create an event."""
+        calendar_users.append(config["configurable"]["user_id"])
+        return _event(event_id, "2030-05-20T15:00:00+00:00")
+
+    hooked = with_appointment_reminders(run_as(create_event, "shop@example.com"))
+    asyncio.run(hooked.ainvoke({"event_id": "studio"}, {"configurable": {"thread_id": "t1"}}))
+    asyncio.run(hooked.ainvoke({"event_id": "client"}, {"configurable": {"user_id": "whatsapp:+1"}}))
+
+    assert calendar_users == ["shop@example.com", "shop@example.com"]
+    # The run without a user_id has nobody to remind
+    store = ReminderStore(str(tmp_path / "reminders.sqlite3"))
+    assert [row["to_number"] for row in store.get_many(range(1, 10))] == ["whatsapp:+1"]
@@ -0,0 +1,55 @@
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "dummy")
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "dummy")
+os.environ.setdefault("TWILIO_PHONE_NUMBER", "dummy")
+
+sys.modules.setdefault(
+    "langgraph_sdk",
+    types.SimpleNamespace(get_client=lambda **_: None),
+)
+
+from langchain_core.messages import AIMessage
+
+from agents.base.reply import Button, Reply
+from src.langgraph_whatsapp.agent import _reply_from_state
+from src.langgraph_whatsapp.channel import WhatsAppAgentTwilio
+
+
+def test_reply_is_read_from_structured_response():
+    reply = Reply(text="Please authorize", button=Button(text="Authorize", url="https://auth"))
+
+    assert _reply_from_state({"messages": [], "structured_response": reply}) == {
+        "text": "Please authorize",
+        "button": {"text": "Authorize", "url": "https://auth"},
+        "media_url": None,
+    }
+
+
+def test_long_button_label_is_trimmed():
+    button = Button(text="Authorize your Google Calendar", url="https://auth")
+
+    assert len(button.text) == 25
+    assert button.text.endswith("…")
+
+
+def test_reply_falls_back_to_last_message_text():
+    state = {"messages": [AIMessage(content=[{"type": "text", "text": "Hi "}, {"type": "text", "text": "there"}])]}
+
+    assert _reply_from_state(state)["text"] == "Hi there"
+
+
+def test_media_reply_is_attached(monkeypatch):
+    agent = WhatsAppAgentTwilio()
+    sent = {}
+    monkeypatch.setattr(agent.twilio_client.messages, "create", lambda **kwargs: sent.update(kwargs))
+
+    reply = agent._format_reply({"text": "Your new look", "button": None, "media_url": "https://img/1.jpg"})
+    agent.send_whatsapp_message("whatsapp:+1", reply)
+
+    assert sent["body"] == "Your new look"
+    assert sent["media_url"] == ["https://img/1.jpg"]
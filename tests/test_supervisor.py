@@ -0,0 +1,144 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+# The channel tests stub langgraph_sdk; langgraph_supervisor needs the real package
+if not hasattr(sys.modules.get("langgraph_sdk"), "__path__"):
+    sys.modules.pop("langgraph_sdk", None)
+
+from typing import Any, List
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.tools import tool
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import MessagesState, StateGraph
+
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "dummy")
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "dummy")
+os.environ.setdefault("TWILIO_PHONE_NUMBER", "dummy")
+
+from agents.base.graph import build_supervisor
+from src.langgraph_whatsapp.agent import _reply_from_state
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Returns the scripted messages in order, ignoring its input."""
+
+    responses: List[AIMessage]
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        return self
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return self._generate(messages, stop, **kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = self.responses[min(self.calls, len(self.responses) - 1)]
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _sub_agent(name: str):
+    def answer(state):
+        return {"messages": [AIMessage(content=f"{name} done", name=name)]}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("answer", answer)
+    builder.set_entry_point("answer")
+    builder.set_finish_point("answer")
+    return builder.compile(name=name)
+
+
+def _handoff(agent_name: str, call_id: str) -> dict:
+    return {"name": f"transfer_to_{agent_name}", "args": {}, "id": call_id, "type": "tool_call"}
+
+
+def _reply(text: str, **fields) -> AIMessage:
+    call = {"name": "Reply", "args": {"text": text, **fields}, "id": "reply", "type": "tool_call"}
+    return AIMessage(content="", tool_calls=[call])
+
+
+def test_parallel_handoffs_run_in_one_superstep_and_join():
+    model = ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[_handoff("calendar_agent", "c1"), _handoff("researcher_agent", "r1")]),
+        _reply("All set"),
+    ])
+    graph = build_supervisor(
+        [_sub_agent("calendar_agent"), _sub_agent("researcher_agent")], model=model
+    ).compile()
+
+    async def run():
+        steps = {}
+        async for event in graph.astream({"messages": [("user", "Book me in")]}, stream_mode="debug"):
+            if event["type"] == "task":
+                steps.setdefault(event["step"], []).append(event["payload"]["name"])
+        return [sorted(names) for _, names in sorted(steps.items())]
+
+    nodes_per_step = asyncio.run(run())
+
+    assert ["calendar_agent", "researcher_agent"] in nodes_per_step
+    joined = nodes_per_step.index(["calendar_agent", "researcher_agent"])
+    assert nodes_per_step[joined + 1] == ["supervisor"]
+
+
+def test_handoff_mixed_with_a_tool_keeps_the_tool_result():
+    @tool
+    def lookup() -> str:
+        """Look something up."""
+        return "looked up"
+
+    model = ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[
+            _handoff("calendar_agent", "c1"),
+            {"name": "lookup", "args": {}, "id": "l1", "type": "tool_call"},
+        ]),
+        AIMessage(content="", tool_calls=[_handoff("calendar_agent", "c2")]),
+        _reply("All set"),
+    ])
+    graph = build_supervisor([_sub_agent("calendar_agent")], model=model, tools=[lookup]).compile()
+
+    state = asyncio.run(graph.ainvoke({"messages": [("user", "Book me in")]}, {"recursion_limit": 20}))
+
+    results = {m.tool_call_id: m for m in state["messages"] if isinstance(m, ToolMessage)}
+    assert results["l1"].content == "looked up"
+    assert results["c1"].content.startswith("Not transferred")
+    assert results["c2"].content == "Successfully transferred to calendar_agent"
+    assert any(m.content == "calendar_agent done" for m in state["messages"])
+
+
+def test_typed_reply_reaches_the_channel_without_an_extra_model_call():
+    model = ScriptedChatModel(responses=[
+        _reply("Please authorize your calendar", button={"text": "Authorize", "url": "https://auth"}),
+    ])
+    graph = build_supervisor([_sub_agent("calendar_agent")], model=model).compile()
+
+    state = asyncio.run(graph.ainvoke({"messages": [("user", "Book me in")]}))
+
+    assert model.calls == 1
+    assert _reply_from_state(state) == {
+        "text": "Please authorize your calendar",
+        "button": {"text": "Authorize", "url": "https://auth"},
+        "media_url": None,
+    }
+
+
+def test_plain_text_answer_is_not_shadowed_by_the_last_reply():
+    model = ScriptedChatModel(responses=[_reply("First"), AIMessage(content="Second")])
+    graph = build_supervisor([_sub_agent("calendar_agent")], model=model).compile(
+        checkpointer=MemorySaver()
+    )
+    config = {"configurable": {"thread_id": "t1"}}
+
+    asyncio.run(graph.ainvoke({"messages": [("user", "Hi")]}, config))
+    state = asyncio.run(graph.ainvoke({"messages": [("user", "Again")]}, config))
+
+    assert _reply_from_state(state)["text"] == "Second"